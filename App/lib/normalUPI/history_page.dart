@@ -16,74 +16,87 @@ class HistoryPage extends StatefulWidget {
 class _HistoryPageState extends State<HistoryPage> {
   String _selectedFilter = 'All';
   final List<String> _filters = const ['All', 'Sent', 'Received', 'Failed'];
+  static const int _pageSize = 50;
+  final ScrollController _scrollController = ScrollController();
   List<Map<String, dynamic>> _transactions = [];
+  String? _nextCursor;
   bool _loading = true;
+  bool _loadingMore = false;
   String? _error;
 
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     _fetchTransactions();
   }
 
+  @override
+  void dispose() {
+    _scrollController.dispose();
+    super.dispose();
+  }
+
+  void _onScroll() {
+    if (_nextCursor != null &&
+        !_loadingMore &&
+        _scrollController.position.extentAfter < 400) {
+      _fetchMore();
+    }
+  }
+
+  /// One page of the merged feed, newest first. Returns null on failure.
+  Future<Map<String, dynamic>?> _fetchPage(String? cursor) async {
+    final prefs = await SharedPreferences.getInstance();
+    final phoneNumber = prefs.getString('phoneNumber');
+    if (phoneNumber == null) {
+      throw 'Phone number not found.';
+    }
+    final response = await http.post(
+      Uri.parse(GET_TRANSACTIONS_URL),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode({
+        'phoneNumber': phoneNumber,
+        'pageSize': _pageSize,
+        if (cursor != null) 'cursor': cursor,
+      }),
+    );
+    if (response.statusCode != 200) return null;
+    return jsonDecode(response.body);
+  }
+
+  Map<String, dynamic> _toTx(dynamic item) {
+    final String timestamp = item['timestamp'] ?? '';
+    final parts = timestamp.split('T');
+    return {
+      'type': item['type'],
+      'recipient': item['counterparty'],
+      'amount': double.tryParse(item['amount'].toString()) ?? 0.0,
+      'date': parts[0],
+      'time': parts.length > 1 ? parts[1].substring(0, 5) : '',
+      'status': item['status'] ?? '',
+    };
+  }
+
   Future<void> _fetchTransactions() async {
     setState(() {
       _loading = true;
       _error = null;
     });
     try {
-      final prefs = await SharedPreferences.getInstance();
-      final phoneNumber = prefs.getString('phoneNumber');
-      if (phoneNumber == null) {
-        setState(() {
-          _loading = false;
-          _error = 'Phone number not found.';
-        });
-        return;
-      }
-      final url = Uri.parse(GET_TRANSACTIONS_URL);
-      final response = await http.post(
-        url,
-        headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({'phoneNumber': phoneNumber}),
-      );
-      if (response.statusCode == 200) {
-        final data = jsonDecode(response.body);
-        List<Map<String, dynamic>> txs = [];
-        for (var tx in data['transactions']['sent']) {
-          txs.add({
-            'type': 'sent',
-            'recipient': tx['receiver__user__upiName'],
-            'amount': double.tryParse(tx['amount'].toString()) ?? 0.0,
-            'date': tx['timestamp']?.split('T')[0] ?? '',
-            'time': tx['timestamp']?.split('T').length > 1
-                ? tx['timestamp'].split('T')[1].substring(0, 5)
-                : '',
-            'status': tx['status'] ?? '',
-          });
-        }
-        for (var tx in data['transactions']['received']) {
-          txs.add({
-            'type': 'received',
-            'recipient': tx['sender__user__upiName'],
-            'amount': double.tryParse(tx['amount'].toString()) ?? 0.0,
-            'date': tx['timestamp']?.split('T')[0] ?? '',
-            'time': tx['timestamp']?.split('T').length > 1
-                ? tx['timestamp'].split('T')[1].substring(0, 5)
-                : '',
-            'status': tx['status'] ?? '',
-          });
-        }
-        setState(() {
-          _transactions = txs;
-          _loading = false;
-        });
-      } else {
+      final data = await _fetchPage(null);
+      if (data == null) {
         setState(() {
           _loading = false;
           _error = 'Failed to fetch transactions.';
         });
+        return;
       }
+      setState(() {
+        _transactions = [for (var item in data['items']) _toTx(item)];
+        _nextCursor = data['nextCursor'];
+        _loading = false;
+      });
     } catch (e) {
       setState(() {
         _loading = false;
@@ -92,6 +105,22 @@ class _HistoryPageState extends State<HistoryPage> {
     }
   }
 
+  Future<void> _fetchMore() async {
+    setState(() => _loadingMore = true);
+    try {
+      final data = await _fetchPage(_nextCursor);
+      setState(() {
+        if (data != null) {
+          _transactions.addAll([for (var item in data['items']) _toTx(item)]);
+          _nextCursor = data['nextCursor'];
+        }
+        _loadingMore = false;
+      });
+    } catch (e) {
+      setState(() => _loadingMore = false);
+    }
+  }
+
   @override
   Widget build(BuildContext context) {
     return Scaffold(
@@ -213,10 +242,17 @@ class _HistoryPageState extends State<HistoryPage> {
       color: AppColors.ink,
       onRefresh: _fetchTransactions,
       child: ListView.separated(
+        controller: _scrollController,
+        physics: const AlwaysScrollableScrollPhysics(),
         padding: const EdgeInsets.fromLTRB(20, 4, 20, 24),
-        itemCount: filtered.length,
+        itemCount: filtered.length + (_loadingMore ? 1 : 0),
         separatorBuilder: (_, __) => const SizedBox(height: 10),
-        itemBuilder: (_, i) => _txTile(filtered[i]),
+        itemBuilder: (_, i) => i < filtered.length
+            ? _txTile(filtered[i])
+            : const Center(
+                child: CircularProgressIndicator(
+                    color: AppColors.ink, strokeWidth: 2.5),
+              ),
       ),
     );
   }
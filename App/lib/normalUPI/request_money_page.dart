@@ -16,8 +16,12 @@ class RequestMoneyPage extends StatefulWidget {
 class _RequestMoneyPageState extends State<RequestMoneyPage>
     with SingleTickerProviderStateMixin {
   late TabController _tabController;
+  static const int _pageSize = 50;
   List<Map<String, dynamic>> _sentRequests = [];
   List<Map<String, dynamic>> _receivedRequests = [];
+  // `nextCursor` of the last page loaded for each tab; null once exhausted.
+  final Map<String, String?> _nextCursors = {'sent': null, 'received': null};
+  final Set<String> _loadingMore = {};
   bool _isLoading = true;
   String? _error;
 
@@ -35,6 +39,20 @@ class _RequestMoneyPageState extends State<RequestMoneyPage>
     super.dispose();
   }
 
+  /// One page of one tab's requests, newest first. Returns null on failure.
+  Future<Map<String, dynamic>?> _fetchPage(
+      String phoneNumber, String direction, String? cursor) async {
+    final url = Uri.parse(GET_REQUESTS_URL).replace(queryParameters: {
+      'phoneNumber': phoneNumber,
+      'direction': direction,
+      'pageSize': '$_pageSize',
+      if (cursor != null) 'cursor': cursor,
+    });
+    final response = await http.get(url);
+    if (response.statusCode != 200) return null;
+    return jsonDecode(response.body);
+  }
+
   Future<void> _loadRequests() async {
     setState(() {
       _isLoading = true;
@@ -50,15 +68,20 @@ class _RequestMoneyPageState extends State<RequestMoneyPage>
         });
         return;
       }
-      final url = Uri.parse('$GET_REQUESTS_URL?phoneNumber=$phoneNumber');
-      final response = await http.get(url);
-      if (response.statusCode == 200) {
-        final data = jsonDecode(response.body);
+      final pages = await Future.wait([
+        _fetchPage(phoneNumber, 'sent', null),
+        _fetchPage(phoneNumber, 'received', null),
+      ]);
+      final sent = pages[0];
+      final received = pages[1];
+      if (sent != null && received != null) {
         setState(() {
           _sentRequests =
-              List<Map<String, dynamic>>.from(data['sentRequests'] ?? []);
-          _receivedRequests =
-              List<Map<String, dynamic>>.from(data['receivedRequests'] ?? []);
+              List<Map<String, dynamic>>.from(sent['sentRequests'] ?? []);
+          _receivedRequests = List<Map<String, dynamic>>.from(
+              received['receivedRequests'] ?? []);
+          _nextCursors['sent'] = sent['nextCursor'];
+          _nextCursors['received'] = received['nextCursor'];
           _isLoading = false;
         });
       } else {
@@ -75,6 +98,37 @@ class _RequestMoneyPageState extends State<RequestMoneyPage>
     }
   }
 
+  Future<void> _loadMore(String direction) async {
+    final cursor = _nextCursors[direction];
+    if (cursor == null || _loadingMore.contains(direction)) return;
+    setState(() => _loadingMore.add(direction));
+    try {
+      final prefs = await SharedPreferences.getInstance();
+      final phoneNumber = prefs.getString('phoneNumber');
+      final page = phoneNumber == null
+          ? null
+          : await _fetchPage(phoneNumber, direction, cursor);
+      setState(() {
+        if (page != null) {
+          final rows = List<Map<String, dynamic>>.from(
+              page['${direction}Requests'] ?? []);
+          (direction == 'sent' ? _sentRequests : _receivedRequests)
+              .addAll(rows);
+          _nextCursors[direction] = page['nextCursor'];
+        }
+        _loadingMore.remove(direction);
+      });
+    } catch (e) {
+      setState(() => _loadingMore.remove(direction));
+    }
+  }
+
+  /// Loads the next page of [direction] when its list nears the end.
+  bool _onScroll(String direction, ScrollNotification notification) {
+    if (notification.metrics.extentAfter < 400) _loadMore(direction);
+    return false;
+  }
+
   Future<void> _updateRequestStatus(int requestId, String status) async {
     try {
       final prefs = await SharedPreferences.getInstance();
@@ -251,11 +305,14 @@ class _RequestMoneyPageState extends State<RequestMoneyPage>
     return RefreshIndicator(
       color: AppColors.ink,
       onRefresh: _loadRequests,
-      child: ListView.separated(
-        padding: const EdgeInsets.fromLTRB(20, 8, 20, 100),
-        itemCount: _receivedRequests.length,
-        separatorBuilder: (_, __) => const SizedBox(height: 12),
-        itemBuilder: (_, i) => _receivedCard(_receivedRequests[i]),
+      child: NotificationListener<ScrollNotification>(
+        onNotification: (n) => _onScroll('received', n),
+        child: ListView.separated(
+          padding: const EdgeInsets.fromLTRB(20, 8, 20, 100),
+          itemCount: _receivedRequests.length,
+          separatorBuilder: (_, __) => const SizedBox(height: 12),
+          itemBuilder: (_, i) => _receivedCard(_receivedRequests[i]),
+        ),
       ),
     );
   }
@@ -268,11 +325,14 @@ class _RequestMoneyPageState extends State<RequestMoneyPage>
     return RefreshIndicator(
       color: AppColors.ink,
       onRefresh: _loadRequests,
-      child: ListView.separated(
-        padding: const EdgeInsets.fromLTRB(20, 8, 20, 100),
-        itemCount: _sentRequests.length,
-        separatorBuilder: (_, __) => const SizedBox(height: 12),
-        itemBuilder: (_, i) => _sentCard(_sentRequests[i]),
+      child: NotificationListener<ScrollNotification>(
+        onNotification: (n) => _onScroll('sent', n),
+        child: ListView.separated(
+          padding: const EdgeInsets.fromLTRB(20, 8, 20, 100),
+          itemCount: _sentRequests.length,
+          separatorBuilder: (_, __) => const SizedBox(height: 12),
+          itemBuilder: (_, i) => _sentCard(_sentRequests[i]),
+        ),
       ),
     );
   }
@@ -178,16 +178,23 @@ class DjangoService {
 
   /// Get transactions history
   /// Calls: GET /accounts/getTransactions/
+  /// Returns one page; pass the previous page's `nextCursor` as [cursor].
   static Future<Map<String, dynamic>> getTransactions(
-    String phoneNumber,
-  ) async {
+    String phoneNumber, {
+    String? cursor,
+    int pageSize = 50,
+  }) async {
     try {
       print('Calling Django getTransactions for: $phoneNumber');
 
       final response = await http.post(
         Uri.parse(GET_TRANSACTIONS_URL),
         headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({'phoneNumber': phoneNumber}),
+        body: jsonEncode({
+          'phoneNumber': phoneNumber,
+          'pageSize': pageSize,
+          if (cursor != null) 'cursor': cursor,
+        }),
       );
 
       print('Django response: ${response.statusCode} - ${response.body}');
@@ -12,5 +12,17 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DJBackend.settings')
+# Serve the read endpoints with the async views; set ASYNC_READ_VIEWS=0 to opt out.
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Needs the app registry, so it comes after the application is created.
+# ASGI servers import this module inside their event loop, where the ORM
+# may not run, so the index is built on a thread of its own.
+import threading  # noqa: E402
+
+from accounts import directory  # noqa: E402
+
+warmup = threading.Thread(target=directory.warm, name='directory-warmup', daemon=True)
+warmup.start()
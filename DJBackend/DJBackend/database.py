@@ -0,0 +1,112 @@
+"""
+``DATABASES['default']`` from a ``DATABASE_URL``.
+
+Connection handling is configured with query parameters on the URL; any
+other parameters are passed to the driver as ``OPTIONS`` (e.g. ``sslmode``):
+
+- ``conn_max_age`` - seconds a connection is reused across requests (Django
+  persistent connections); ``0`` closes it after every request.
+- ``conn_health_checks`` - ``1`` (default) pings a reused connection before
+  the first query of a request and reconnects if it has gone away.
+- ``pool=1`` - use a psycopg 3 connection pool instead (PostgreSQL only,
+  needs ``psycopg[pool]``), sized by ``pool_min_size``/``pool_max_size``;
+  ``pool_timeout`` bounds the wait for a free connection and
+  ``pool_max_idle`` retires idle connections. Pooled connections are
+  checked on checkout.
+"""
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'postgres': 'django.db.backends.postgresql',
+    'postgresql': 'django.db.backends.postgresql',
+    'sqlite': 'django.db.backends.sqlite3',
+}
+# Persistent connections by default; under ASGI Django opens a connection per
+# request thread, so the pool is the way to reuse connections there.
+DEFAULT_CONN_MAX_AGE = 60
+# Local SQLite: IMMEDIATE transactions take the write lock up front so
+# concurrent transfers queue on `timeout` instead of failing with "database
+# is locked" when a read lock is upgraded.
+SQLITE_OPTIONS = {'timeout': 20, 'transaction_mode': 'IMMEDIATE'}
+
+
+def _flag(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def _pool_options(params):
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        raise ImproperlyConfigured('pool=1 in DATABASE_URL needs psycopg 3 with psycopg-pool installed')
+    return {
+        'min_size': int(params.pop('pool_min_size', 2)),
+        'max_size': int(params.pop('pool_max_size', 20)),
+        'timeout': float(params.pop('pool_timeout', 10)),
+        'max_idle': float(params.pop('pool_max_idle', 600)),
+        'check': ConnectionPool.check_connection,
+    }
+
+
+def parse_database_url(url, base_dir=None, conn_max_age=DEFAULT_CONN_MAX_AGE):
+    """
+    Django database settings for ``url``. ``conn_max_age`` is the default
+    when the URL does not set one. Relative ``sqlite:///name`` paths are
+    resolved against ``base_dir``.
+    """
+    parsed = urlparse(url)
+    engine = ENGINES.get(parsed.scheme)
+    if engine is None:
+        raise ImproperlyConfigured(f'Unsupported DATABASE_URL scheme: {parsed.scheme!r}')
+    params = dict(parse_qsl(parsed.query))
+    config = {
+        'ENGINE': engine,
+        'CONN_MAX_AGE': int(params.pop('conn_max_age', conn_max_age)),
+        'CONN_HEALTH_CHECKS': _flag(params.pop('conn_health_checks', '1')),
+    }
+    pool = _flag(params.pop('pool', '0'))
+    for key in ('pool_min_size', 'pool_max_size', 'pool_timeout', 'pool_max_idle'):
+        if key in params and not pool:
+            raise ImproperlyConfigured(f'{key} in DATABASE_URL needs pool=1')
+
+    if engine == ENGINES['sqlite']:
+        if pool:
+            raise ImproperlyConfigured('pool=1 is only supported for PostgreSQL')
+        name = parsed.path[1:] if parsed.path.startswith('/') else parsed.path
+        config['NAME'] = base_dir / name if base_dir is not None and not name.startswith('/') else name
+        options = dict(SQLITE_OPTIONS)
+        if 'timeout' in params:
+            options['timeout'] = float(params.pop('timeout'))
+        options.update(params)
+        config['OPTIONS'] = options
+        return config
+
+    config.update({
+        'NAME': parsed.path.lstrip('/'),
+        'USER': parsed.username,
+        'PASSWORD': parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
+    })
+    if pool:
+        # Pooled connections go back to the pool at the end of each request.
+        params['pool'] = _pool_options(params)
+        config['CONN_MAX_AGE'] = 0
+    config['OPTIONS'] = params
+    return config
+
+
+def with_params(url, **params):
+    """``url`` with query parameters added, replaced or (when ``None``) removed."""
+    # Only the query string is rewritten; urlunparse would turn the empty
+    # netloc of sqlite:////abs/path URLs into a host.
+    base, _, query = url.partition('?')
+    query = dict(parse_qsl(query))
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = str(value)
+    return f'{base}?{urlencode(query)}' if query else base
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DJBackend.settings')
 
 application = get_wsgi_application()
+
+# Needs the app registry, so it comes after the application is created.
+from accounts import directory  # noqa: E402
+
+directory.warm()
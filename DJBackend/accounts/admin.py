@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, UserAccount, Transaction, MoneyRequest, OTP
+from .models import User, UserAccount, Transaction, MoneyRequest, OTP, IdempotencyKey, LedgerEntry
 
 # Register your models here.
 @admin.register(OTP)
@@ -29,3 +29,20 @@ class TransactionAdmin(admin.ModelAdmin):
 class MoneyRequestAdmin(admin.ModelAdmin):
     list_display = ['requester', 'requestee', 'amount', 'status', 'created_at']
     list_filter = ['status', 'created_at']
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'endpoint', 'response_status', 'created_at', 'expires_at']
+    list_filter = ['endpoint']
+    search_fields = ['key']
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ['account', 'direction', 'amount', 'balance_after', 'transaction', 'created_at']
+    list_filter = ['direction', 'created_at']
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
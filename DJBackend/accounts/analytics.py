@@ -0,0 +1,175 @@
+"""
+Per-account monthly spend/receive analytics.
+
+``UserMonthlyStats`` holds an account's totals and counts per month, and
+``UserCounterpartyStats`` splits them by the other account of each
+transfer. The transfer service calls :func:`record` inside its atomic block,
+so the stats commit or roll back with the transfer. Every row belongs to an
+account the transfer has locked, so concurrent transfers cannot race. Each
+call costs one ``INSERT ... ON CONFLICT DO UPDATE`` per table, however many
+transfers it records.
+
+:func:`rebuild` recomputes the tables from ``Transaction`` and
+``ArchivedTransaction`` with ``GROUP BY`` queries, in account chunks.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+from .archive import month_of
+from .models import ArchivedTransaction, Transaction, UserAccount, UserCounterpartyStats, UserMonthlyStats
+
+STATS_FIELDS = ('spent_total', 'spent_count', 'received_total', 'received_count')
+ZERO = Decimal('0.00')
+DEFAULT_TOP_PAYEES = 5
+
+
+def _upsert_add(model, key_fields, rows):
+    """
+    Insert ``rows`` (key values followed by ``STATS_FIELDS`` values), adding
+    the stats to any existing row with the same key. PostgreSQL and SQLite
+    share this syntax.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    key_columns = [model._meta.get_field(name).column for name in key_fields]
+    columns = ', '.join(quote(column) for column in [*key_columns, *STATS_FIELDS])
+    updates = ', '.join(f'{quote(field)} = {table}.{quote(field)} + excluded.{quote(field)}' for field in STATS_FIELDS)
+    row_sql = '(' + ', '.join(['%s'] * (len(key_fields) + len(STATS_FIELDS))) + ')'
+    adapt = {
+        'month': connection.ops.adapt_datefield_value,
+        'spent_total': connection.ops.adapt_decimalfield_value,
+        'received_total': connection.ops.adapt_decimalfield_value,
+    }
+    names = [*key_fields, *STATS_FIELDS]
+    params = [adapt[name](value) if name in adapt else value for row in rows for name, value in zip(names, row)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) VALUES {", ".join([row_sql] * len(rows))} '
+            f'ON CONFLICT ({", ".join(quote(column) for column in key_columns)}) DO UPDATE SET {updates}',
+            params,
+        )
+
+
+def _deltas():
+    return defaultdict(lambda: [0, 0, 0, 0])
+
+
+def _write(monthly, by_counterparty, batch_size=500):
+    """Upsert ``{key: [spent_total, spent_count, received_total, received_count]}`` maps."""
+    for model, keys, deltas in (
+        (UserMonthlyStats, ('account', 'month'), monthly),
+        (UserCounterpartyStats, ('account', 'month', 'counterparty'), by_counterparty),
+    ):
+        rows = [(*key, *delta) for key, delta in deltas.items()]
+        for start in range(0, len(rows), batch_size):
+            _upsert_add(model, keys, rows[start:start + batch_size])
+
+
+def record(transfers):
+    """
+    Add completed ``(sender_id, receiver_id, amount, timestamp)`` transfers
+    to the stats. Must run inside the transfer's atomic block, with both
+    accounts locked.
+    """
+    monthly, by_counterparty = _deltas(), _deltas()
+    for sender_id, receiver_id, amount, timestamp in transfers:
+        month = month_of(timestamp)
+        for delta in (monthly[sender_id, month], by_counterparty[sender_id, month, receiver_id]):
+            delta[0] += amount
+            delta[1] += 1
+        for delta in (monthly[receiver_id, month], by_counterparty[receiver_id, month, sender_id]):
+            delta[2] += amount
+            delta[3] += 1
+    _write(monthly, by_counterparty)
+
+
+def _grouped(model, side, other, low, high):
+    """Completed totals per ``(side, month, other)`` for ``side`` accounts in ``low..high``."""
+    return (
+        model.objects.filter(status='completed', **{f'{side}__gte': low, f'{side}__lte': high})
+        .annotate(month=TruncMonth('timestamp', output_field=DateField()))
+        .values(side, 'month', other).annotate(total=Sum('amount'), count=Count('id')).order_by()
+        .values_list(side, 'month', other, 'total', 'count')
+    )
+
+
+def _rebuild_chunk(low, high):
+    monthly, by_counterparty = _deltas(), _deltas()
+    for model in (Transaction, ArchivedTransaction):
+        for side, other, offset in (('sender_id', 'receiver_id', 0), ('receiver_id', 'sender_id', 2)):
+            for account_id, month, counterparty_id, total, count in _grouped(model, side, other, low, high):
+                for delta in (monthly[account_id, month], by_counterparty[account_id, month, counterparty_id]):
+                    delta[offset] += total
+                    delta[offset + 1] += count
+    UserMonthlyStats.objects.filter(account_id__gte=low, account_id__lte=high).delete()
+    UserCounterpartyStats.objects.filter(account_id__gte=low, account_id__lte=high).delete()
+    _write(monthly, by_counterparty)
+    return len(monthly)
+
+
+def rebuild(chunk_size=1000, low=None, high=None, stdout=None):
+    """
+    Recompute the stats of every account (or those with primary keys in
+    ``low..high``) from the transaction history, ``chunk_size`` accounts at
+    a time. Each chunk runs in one database transaction with its accounts
+    locked, so transfers that commit meanwhile are neither lost nor counted
+    twice. Returns ``(accounts, monthly_rows)``.
+    """
+    accounts = UserAccount.objects.order_by('pk')
+    if low is not None:
+        accounts = accounts.filter(pk__gte=low, pk__lte=high)
+    processed = rows = 0
+    last_pk = None
+    while True:
+        chunk = accounts if last_pk is None else accounts.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            # Locked in primary-key order, like the transfer service.
+            ids = list(chunk.select_for_update().values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            rows += _rebuild_chunk(ids[0], ids[-1])
+        last_pk = ids[-1]
+        processed += len(ids)
+        if stdout is not None:
+            stdout.write(f'rebuilt accounts up to pk {last_pk} ({processed} accounts, {rows} monthly rows)')
+    return processed, rows
+
+
+def parse_month(value):
+    """A ``YYYY-MM`` string as the first day of that month; raises ``ValueError``."""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return date(year, month, 1)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('month must be YYYY-MM')
+
+
+def month_summary(account_id, month, top=DEFAULT_TOP_PAYEES):
+    """
+    Totals, counts and the ``top`` payees of ``account_id`` in ``month``:
+    two indexed reads whatever the history length.
+    """
+    stats = UserMonthlyStats.objects.filter(account_id=account_id, month=month).first()
+    payees = (
+        UserCounterpartyStats.objects.filter(account_id=account_id, month=month, spent_count__gt=0)
+        .order_by('-spent_total', 'counterparty_id')
+        .values_list('counterparty__user__upiName', 'counterparty__user__upiMail', 'spent_total', 'spent_count')[:top]
+    )
+    if stats is None:
+        stats = UserMonthlyStats(spent_total=ZERO, received_total=ZERO)
+    return {
+        'month': month.strftime('%Y-%m'),
+        'spent': {'total': stats.spent_total, 'count': stats.spent_count},
+        'received': {'total': stats.received_total, 'count': stats.received_count},
+        'topPayees': [
+            {'upiName': name, 'upiId': mail, 'total': total, 'count': count}
+            for name, mail, total, count in payees
+        ],
+    }
@@ -0,0 +1,162 @@
+"""
+Archival of old transactions into ``ArchivedTransaction`` with per-account
+monthly rollups.
+
+Each batch moves the oldest transactions before the cutoff. It copies them
+to the archive table with one ``INSERT ... SELECT``, adds their completed
+amounts to ``AccountMonthlyRollup`` (two ``GROUP BY`` queries) and deletes
+them from ``Transaction``, all in one database transaction. A run can be
+stopped at any point and started again with the same cutoff. Ledger entries
+are not moved.
+
+Live reads use the hot table plus the rollups: the last
+``getTransactions`` page lists archived months, statements begin with
+whole-month summary rows, and reconciliation adds the rolled-up totals.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AccountMonthlyRollup, ArchivedTransaction, Transaction
+
+ROLLUP_FIELDS = ('sent_total', 'sent_count', 'received_total', 'received_count')
+
+
+def month_of(timestamp):
+    """First day of ``timestamp``'s month in ``TIME_ZONE``."""
+    return timezone.localtime(timestamp).date().replace(day=1)
+
+
+def cutoff_for(older_than_days, now=None):
+    """
+    Start of the month containing ``now - older_than_days``. Cutting at a
+    month boundary means every rollup covers a whole month.
+    """
+    then = timezone.localtime((now or timezone.now()) - timedelta(days=older_than_days))
+    return then.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollup_deltas(batch):
+    """``{(account_id, month): [sent_total, sent_count, received_total, received_count]}`` for ``batch``."""
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    completed = batch.filter(status='completed').annotate(month=TruncMonth('timestamp', output_field=DateField()))
+    for side, offset in (('sender_id', 0), ('receiver_id', 2)):
+        totals = completed.values(side, 'month').annotate(total=Sum('amount'), count=Count('id')).order_by()
+        for row in totals:
+            delta = deltas[row[side], row['month']]
+            delta[offset] += row['total']
+            delta[offset + 1] += row['count']
+    return deltas
+
+
+def _copy_to_archive(ids, archived_at):
+    quote = connection.ops.quote_name
+    # Every archive column but archived_at has the same name in Transaction.
+    columns = ', '.join(
+        quote(field.column) for field in ArchivedTransaction._meta.concrete_fields if field.name != 'archived_at'
+    )
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(ArchivedTransaction._meta.db_table)} ({columns}, {quote("archived_at")}) '
+            f'SELECT {columns}, %s FROM {quote(Transaction._meta.db_table)} WHERE {quote("id")} IN ({placeholders})',
+            [connection.ops.adapt_datetimefield_value(archived_at), *ids],
+        )
+
+
+def _apply_rollups(deltas):
+    # Rows being added to are replaced by merged copies: one DELETE and one
+    # multi-row INSERT, where bulk_update would build a CASE per column.
+    stale = [
+        rollup for rollup in AccountMonthlyRollup.objects.select_for_update().filter(
+            account_id__in={account_id for account_id, _ in deltas},
+            month__in={month for _, month in deltas},
+        )
+        if (rollup.account_id, rollup.month) in deltas
+    ]
+    merged = {
+        (rollup.account_id, rollup.month): [getattr(rollup, field) for field in ROLLUP_FIELDS] for rollup in stale
+    }
+    for key, delta in deltas.items():
+        totals = merged.setdefault(key, [0, 0, 0, 0])
+        for index, value in enumerate(delta):
+            totals[index] += value
+    AccountMonthlyRollup.objects.filter(pk__in=[rollup.pk for rollup in stale]).delete()
+    AccountMonthlyRollup.objects.bulk_create([
+        AccountMonthlyRollup(account_id=account_id, month=month, **dict(zip(ROLLUP_FIELDS, totals)))
+        for (account_id, month), totals in merged.items()
+    ])
+
+
+def archive_batch(cutoff, batch_size=5000):
+    """Archive up to ``batch_size`` of the oldest transactions before ``cutoff``; returns how many."""
+    with transaction.atomic():
+        ids = list(
+            Transaction.objects.select_for_update().filter(timestamp__lt=cutoff).order_by('timestamp', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        batch = Transaction.objects.filter(pk__in=ids)
+        _copy_to_archive(ids, timezone.now())
+        _apply_rollups(_rollup_deltas(batch))
+        batch.delete()
+    return len(ids)
+
+
+def archive(cutoff, batch_size=5000, max_batches=None, stdout=None):
+    """
+    Archive every transaction before ``cutoff``, or stop after
+    ``max_batches`` batches. Returns ``(archived, batches)``.
+    """
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+        if stdout is not None:
+            stdout.write(f'batch {batches}: archived {moved} ({archived} total)')
+    return archived, batches
+
+
+def rollup_totals(account_ids=None, low=None, high=None):
+    """
+    ``{account_id: (sent_total, received_total)}`` over all archived months,
+    for the given ids or the ``low..high`` primary-key range.
+    """
+    rollups = AccountMonthlyRollup.objects.all()
+    if account_ids is not None:
+        rollups = rollups.filter(account_id__in=account_ids)
+    if low is not None:
+        rollups = rollups.filter(account_id__gte=low, account_id__lte=high)
+    totals = rollups.values('account_id').annotate(sent=Sum('sent_total'), received=Sum('received_total')).order_by()
+    return {row['account_id']: (row['sent'], row['received']) for row in totals}
+
+
+def _serialize_rollup(rollup):
+    return {
+        'month': rollup.month.strftime('%Y-%m'),
+        'sentTotal': rollup.sent_total,
+        'sentCount': rollup.sent_count,
+        'receivedTotal': rollup.received_total,
+        'receivedCount': rollup.received_count,
+    }
+
+
+def _month_rollups(account_id):
+    return AccountMonthlyRollup.objects.filter(account_id=account_id).order_by('-month')
+
+
+def archived_months(account_id):
+    """An account's archived months, newest first, for the last ``getTransactions`` page."""
+    return [_serialize_rollup(rollup) for rollup in _month_rollups(account_id)]
+
+
+async def aarchived_months(account_id):
+    return [_serialize_rollup(rollup) async for rollup in _month_rollups(account_id)]
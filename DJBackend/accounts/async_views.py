@@ -0,0 +1,183 @@
+"""
+Async versions of the read-only endpoints, served when ``ASYNC_READ_VIEWS``
+is on (the default under ``DJBackend/asgi.py``).
+
+DRF's ``@api_view`` cannot wrap coroutines, so these are plain Django async
+views using the async ORM. Responses match the sync views in ``views.py``
+field for field.
+"""
+import json
+
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import balance_cache, money_requests
+from .archive import aarchived_months
+from .history import alegacy_transactions, atransaction_page, legacy_payload, page_payload
+from .models import User
+from .pagination import decode_cursor, is_paginating, parse_page_size, InvalidCursor
+from .phone import canonicalize_phone_number, get_phone_candidates
+from .responses import JsonResponse
+from .routers import replica_reads
+from .resolvers import aresolve_phone, UserNotFound, AccountMissing
+
+
+async def _aget_user_by_phone(phone):
+    """Async ``views.get_user_by_phone``."""
+    canonical = canonicalize_phone_number(phone)
+    if not canonical:
+        return None
+    user = await User.objects.filter(phone_canonical=canonical).afirst()
+    if user is None and settings.PHONE_LOOKUP_LEGACY_FALLBACK:
+        user = await User.objects.filter(phoneNumber__in=get_phone_candidates(phone)).afirst()
+    return user
+
+
+def _request_data(request):
+    """The JSON object or form fields DRF would expose as ``request.data``."""
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+def _not_found(error=None):
+    """The 404 body the sync views send for UserNotFound / AccountMissing."""
+    message = 'User account not found' if isinstance(error, AccountMissing) else 'User not found'
+    return JsonResponse({
+        'error': message,
+        'status': 'error'
+    }, status=404)
+
+
+@require_GET
+@replica_reads
+async def searchNumber(request):
+    user = await _aget_user_by_phone(request.GET.get('phoneNumber'))
+    if not user:
+        return _not_found()
+    return JsonResponse({
+        'upiName': user.upiName,
+        'upiId': user.upiMail,
+        'status': 'success'
+    })
+
+
+@require_GET
+@replica_reads
+async def searchByUpiId(request):
+    user = await User.objects.filter(upiMail=request.GET.get('upiId')).afirst()
+    if not user:
+        return _not_found()
+    return JsonResponse({
+        'upiName': user.upiName,
+        'phoneNumber': user.phoneNumber,
+        'status': 'success'
+    })
+
+
+@require_GET
+@replica_reads
+async def getProfile(request):
+    user = await _aget_user_by_phone(request.GET.get('phoneNumber'))
+    if not user:
+        return _not_found()
+    return JsonResponse({
+        'upiName': user.upiName,
+        'upiId': user.upiMail,
+        'status': 'success'
+    })
+
+
+@require_GET
+async def getBalance(request):
+    phoneNumber = request.GET.get('phoneNumber')
+    canonical = canonicalize_phone_number(phoneNumber)
+    cached, token = await balance_cache.aget_balance(canonical) if canonical else (None, None)
+    if cached is not None:
+        return JsonResponse({
+            'balance': cached,
+            'status': 'success'
+        })
+    try:
+        user_account = await aresolve_phone(phoneNumber)
+    except (UserNotFound, AccountMissing) as e:
+        return _not_found(e)
+    await balance_cache.aset_balance(canonical, user_account.pk, user_account.balance, token)
+    return JsonResponse({
+        'balance': str(user_account.balance),
+        'status': 'success'
+    })
+
+
+@csrf_exempt
+@require_POST
+@replica_reads
+async def getTransactions(request):
+    """Async ``views.getTransactions``."""
+    try:
+        params = _request_data(request) or request.GET
+    except ValueError:
+        return JsonResponse({
+            'error': 'Malformed JSON body',
+            'status': 'error'
+        }, status=400)
+    phoneNumber = params.get('phoneNumber') or request.GET.get('phoneNumber')
+    try:
+        cursor = params.get('cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
+    page_size = parse_page_size(params.get('pageSize'))
+
+    try:
+        user_account = await aresolve_phone(phoneNumber)
+    except (UserNotFound, AccountMissing) as e:
+        return _not_found(e)
+    if not is_paginating(params):
+        return JsonResponse(legacy_payload(*await alegacy_transactions(user_account.pk, settings.LEGACY_LISTING_LIMIT)))
+    rows, next_cursor = await atransaction_page(user_account.pk, cursor, page_size)
+    archived = await aarchived_months(user_account.pk) if next_cursor is None else ()
+    return JsonResponse(page_payload(rows, next_cursor, archived))
+
+
+@require_GET
+async def checkHasAccount(request):
+    try:
+        await aresolve_phone(request.GET.get('phoneNumber'))
+    except (UserNotFound, AccountMissing):
+        return JsonResponse({
+            'hasAccount': False,
+            'status': 'error'
+        }, status=404)
+    return JsonResponse({
+        'hasAccount': True,
+        'status': 'success'
+    })
+
+
+@require_GET
+@replica_reads
+async def getMoneyRequests(request):
+    try:
+        filters = money_requests.parse_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
+    try:
+        user_account = await aresolve_phone(request.GET.get('phoneNumber'))
+    except (UserNotFound, AccountMissing) as e:
+        return _not_found(e)
+    if not is_paginating(request.GET):
+        return JsonResponse(money_requests.legacy_payload(
+            *await money_requests.alegacy_requests(user_account.pk, settings.LEGACY_LISTING_LIMIT, **filters)
+        ))
+    rows, next_cursor = await money_requests.arequest_page(user_account.pk, **filters)
+    pending = await money_requests.apending_count(user_account.pk)
+    return JsonResponse(money_requests.page_payload(rows, next_cursor, pending))
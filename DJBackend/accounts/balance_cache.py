@@ -0,0 +1,141 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class _Counters:
+    """Process-local hit/miss counters for the balance cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def add(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+
+counters = _Counters()
+
+
+def _cache():
+    return caches[settings.BALANCE_CACHE_ALIAS]
+
+
+def _account_key(canonical_phone):
+    return f'balance:account:{canonical_phone}'
+
+
+def _balance_key(account_id):
+    return f'balance:{account_id}'
+
+
+def _version_key(account_id):
+    return f'balance:version:{account_id}'
+
+
+# Cached balances are stored as ``(version, balance)``. ``invalidate`` bumps
+# the account's version when a transfer commits, so a fill that read the
+# balance before the commit but wrote it after is never served: it carries
+# the old version. The version is read before the database read, which needs
+# the account id, so the first lookup of a phone only learns its account.
+
+
+def _lookup(account_id, values):
+    version = values.get(_version_key(account_id), 0)
+    entry = values.get(_balance_key(account_id))
+    if entry is not None and entry[0] == version:
+        counters.add('hits')
+        return entry[1], None
+    counters.add('misses')
+    return None, version
+
+
+def get_balance(canonical_phone):
+    """
+    ``(balance, token)`` for a canonical phone. ``balance`` is the cached
+    string, or None on a miss; pass ``token`` to :func:`set_balance` with the
+    balance then read from the database.
+    """
+    if not settings.BALANCE_CACHE_ENABLED:
+        return None, None
+    cache = _cache()
+    account_id = cache.get(_account_key(canonical_phone))
+    if account_id is None:
+        counters.add('misses')
+        return None, None
+    return _lookup(account_id, cache.get_many([_balance_key(account_id), _version_key(account_id)]))
+
+
+def set_balance(canonical_phone, account_id, balance, token):
+    """Populate the cache after a miss was served from the database."""
+    if not settings.BALANCE_CACHE_ENABLED:
+        return
+    cache = _cache()
+    # Phone -> account never changes once an account exists.
+    cache.set(_account_key(canonical_phone), account_id, timeout=None)
+    if token is not None:
+        cache.set(_balance_key(account_id), (token, str(balance)), timeout=settings.BALANCE_CACHE_TTL)
+
+
+async def aget_balance(canonical_phone):
+    """Async :func:`get_balance`."""
+    if not settings.BALANCE_CACHE_ENABLED:
+        return None, None
+    cache = _cache()
+    account_id = await cache.aget(_account_key(canonical_phone))
+    if account_id is None:
+        counters.add('misses')
+        return None, None
+    return _lookup(account_id, await cache.aget_many([_balance_key(account_id), _version_key(account_id)]))
+
+
+async def aset_balance(canonical_phone, account_id, balance, token):
+    """Async :func:`set_balance`."""
+    if not settings.BALANCE_CACHE_ENABLED:
+        return
+    cache = _cache()
+    await cache.aset(_account_key(canonical_phone), account_id, timeout=None)
+    if token is not None:
+        await cache.aset(_balance_key(account_id), (token, str(balance)), timeout=settings.BALANCE_CACHE_TTL)
+
+
+def _bump(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version yet, which reads as 0.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def invalidate(account_ids):
+    """Bump and drop cached balances for ``account_ids`` once the current transaction commits."""
+    if not settings.BALANCE_CACHE_ENABLED:
+        return
+    account_ids = set(account_ids)
+
+    def drop():
+        cache = _cache()
+        for account_id in account_ids:
+            _bump(cache, _version_key(account_id))
+        cache.delete_many([_balance_key(account_id) for account_id in account_ids])
+        counters.add('invalidations', len(account_ids))
+
+    transaction.on_commit(drop)
+
+
+def stats():
+    return counters.snapshot()
@@ -0,0 +1,391 @@
+"""
+Reproducible load benchmark for the accounts API.
+
+Seeds a self-contained population of benchmark users (``@bench.upi``) and
+drives every route in ``accounts/urls.py`` in-process, either through
+Django's test client from a thread pool (WSGI) or through the ASGI handler
+from a single event loop, measuring latency and queries per request. Used by
+``manage.py benchmark_api``.
+"""
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connection
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.test import Client
+
+from . import history, money_requests, responses, synthetic
+from .models import User, UserAccount, MoneyRequest, Transaction
+from .urls import urlpatterns
+
+BENCH_DOMAIN = '@bench.upi'
+PHONE_PREFIX = '+9188'
+SIGNUP_PREFIX = 'benchsignup'
+SIGNUP_PHONE_PREFIX = '+9177'
+# URL names served by accounts/async_views.py when ASYNC_READ_VIEWS is on.
+READ_ENDPOINTS = (
+    'searchPhoneNumber', 'searchByUpiId', 'getProfile', 'getBalance',
+    'getTransactions', 'checkAccount', 'getMoneyRequests',
+)
+
+
+def bench_phone(index):
+    return f'{PHONE_PREFIX}{index:08d}'
+
+
+def bench_upi(index):
+    return f'bench{index}{BENCH_DOMAIN}'
+
+
+def clear():
+    """Remove every benchmark user and, by cascade, their accounts and history."""
+    User.objects.filter(Q(upiMail__endswith=BENCH_DOMAIN) | Q(upiName__startswith=SIGNUP_PREFIX)).delete()
+
+
+def seed(users, transactions, money_requests, seed=0, batch_size=5000):
+    """
+    Create ``users`` benchmark users with accounts plus power-law history.
+
+    Delegates to :func:`synthetic.generate`, which writes in large batches so
+    seeding scales to large populations. Returns the benchmark context used by
+    the scenarios.
+    """
+    clear()
+    summary = synthetic.generate(
+        users, transactions, money_requests, seed=seed, opening=Decimal('100000.00'), batch_size=batch_size,
+        phone_prefix=PHONE_PREFIX, name_prefix='bench', domain=BENCH_DOMAIN,
+    )
+    return {'users': users, 'account_ids': list(summary['account_ids'])}
+
+
+class Scenarios:
+    """One request factory per URL name; each returns ``(method, path, data, kwargs)``."""
+
+    def __init__(self, context, seed=0):
+        self.users = context['users']
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+
+    def _user(self):
+        with self.lock:
+            return self.rng.randrange(self.users)
+
+    def _two_users(self):
+        with self.lock:
+            return self.rng.sample(range(self.users), 2)
+
+    def _pending_request(self, phone_index):
+        account = UserAccount.objects.get(user__phone_canonical=bench_phone(phone_index))
+        other = UserAccount.objects.filter(user__upiMail__endswith=BENCH_DOMAIN).exclude(pk=account.pk).first()
+        return MoneyRequest.objects.create(requester=other, requestee=account, amount=Decimal('1.00'), message='bench')
+
+    def signup(self):
+        n = next(self.counter)
+        return 'post', '/accounts/signup/', {'upiName': f'{SIGNUP_PREFIX}{n}', 'phoneNumber': f'{SIGNUP_PHONE_PREFIX}{n:08d}'}, {}
+
+    def send_otp(self):
+        return 'get', '/accounts/send_otp/', {'phone': bench_phone(self._user())}, {}
+
+    def verify_otp(self):
+        return 'get', '/accounts/verify_otp/', {'phone': bench_phone(self._user()), 'otp': '000000'}, {}
+
+    def searchPhoneNumber(self):
+        return 'get', '/accounts/searchPhonenumber/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def searchByUpiId(self):
+        return 'get', '/accounts/searchByUpiId/', {'upiId': bench_upi(self._user())}, {}
+
+    def searchUpiDirectory(self):
+        name = f'bench{self._user()}'
+        # Alternate typing-in-progress prefixes with a dropped-letter typo.
+        query = name[:-1] if next(self.counter) % 2 else name[:3] + name[4:]
+        return 'get', '/accounts/searchUpiDirectory/', {'q': query}, {}
+
+    def getProfile(self):
+        return 'get', '/accounts/getProfile/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def getBalance(self):
+        return 'get', '/accounts/getBalance/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def checkAccount(self):
+        return 'get', '/accounts/checkHasAccount/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def getTransactions(self):
+        return 'post', '/accounts/getTransactions/', {'phoneNumber': bench_phone(self._user()), 'pageSize': 50}, {}
+
+    def exportStatement(self):
+        return 'get', '/accounts/exportStatement/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def getMoneyRequests(self):
+        return 'get', '/accounts/getMoneyRequests/', {'phoneNumber': bench_phone(self._user()), 'pageSize': 50}, {}
+
+    def getSpendingAnalytics(self):
+        return 'get', '/accounts/getSpendingAnalytics/', {'phoneNumber': bench_phone(self._user())}, {}
+
+    def sendMoneyPhone(self):
+        a, b = self._two_users()
+        return 'post', '/accounts/sendMoneyPhone/', {'senderPhone': bench_phone(a), 'receiverPhone': bench_phone(b), 'amount': '1'}, {}
+
+    def sendMoneyId(self):
+        a, b = self._two_users()
+        return 'post', '/accounts/sendMoneyId/', {'senderPhone': bench_phone(a), 'receiverUpi': bench_upi(b), 'amount': '1'}, {}
+
+    def bulkTransfer(self):
+        a = self._user()
+        transfers = [{'receiverUpi': bench_upi((a + i) % self.users), 'amount': '1'} for i in range(1, 11)]
+        return 'post', '/accounts/bulkTransfer/', {'senderPhone': bench_phone(a), 'transfers': transfers}, {'content_type': 'application/json'}
+
+    def createMoneyRequest(self):
+        a, b = self._two_users()
+        return 'post', '/accounts/createMoneyRequest/', {'requesterPhone': bench_phone(a), 'requesteePhone': bench_phone(b), 'amount': '1'}, {}
+
+    def createMoneyRequestByUpi(self):
+        a, b = self._two_users()
+        return 'post', '/accounts/createMoneyRequestByUpi/', {'requesterPhone': bench_phone(a), 'requesteeUpi': bench_upi(b), 'amount': '1'}, {}
+
+    def updateRequestStatus(self):
+        a = self._user()
+        money_request = self._pending_request(a)
+        return 'post', '/accounts/updateRequestStatus/', {'requestId': money_request.id, 'status': 'approved', 'phoneNumber': bench_phone(a)}, {}
+
+    def bulkUpdateRequestStatus(self):
+        a = self._user()
+        ids = [self._pending_request(a).id for _ in range(5)]
+        return 'post', '/accounts/bulkUpdateRequestStatus/', {'phoneNumber': bench_phone(a), 'requestIds': ids, 'status': 'approved'}, {'content_type': 'application/json'}
+
+
+def endpoint_names():
+    return [pattern.name for pattern in urlpatterns]
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    """JSON-ready summary of one endpoint run (latencies in seconds)."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+        },
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def _busiest_accounts(account_ids, count):
+    sent = (
+        Transaction.objects.filter(sender_id__in=account_ids).values('sender_id')
+        .annotate(total=Count('id')).order_by('-total').values_list('sender_id', flat=True)
+    )
+    return list(sent[:count])
+
+
+def _time_pages(encode, pages):
+    started = time.perf_counter()
+    for page in pages:
+        encode(page)
+    return time.perf_counter() - started
+
+
+def compare_encoders(context, accounts=20, repeat=20):
+    """
+    Time encoding full ``getTransactions`` and ``getMoneyRequests`` pages
+    (``PAGINATION_MAX_PAGE_SIZE`` rows, from the busiest accounts) with the
+    stdlib ``DjangoJSONEncoder`` that ``django.http.JsonResponse`` uses and
+    with :func:`responses.dumps`. Milliseconds per page, best of ``repeat``.
+    """
+    page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    ids = _busiest_accounts(context['account_ids'], accounts)
+    payloads = {
+        'getTransactions': [history.page_payload(*history.transaction_page(pk, None, page_size)) for pk in ids],
+        'getMoneyRequests': [
+            money_requests.page_payload(*money_requests.request_page(pk, page_size=page_size), 0) for pk in ids
+        ],
+    }
+    encoders = {
+        'stdlib': lambda data: json.dumps(data, cls=DjangoJSONEncoder).encode(),
+        'fast': responses.dumps,
+    }
+    report = {'encoder': 'orjson' if responses.orjson is not None else 'stdlib'}
+    for name, pages in payloads.items():
+        timings = {
+            f'{label}_ms': round(min(_time_pages(encode, pages) for _ in range(repeat)) / len(pages) * 1000, 3)
+            for label, encode in encoders.items()
+        }
+        timings['rows_per_page'] = round(statistics.fmean(len(page['items']) for page in pages), 1)
+        timings['speedup'] = round(timings['stdlib_ms'] / timings['fast_ms'], 2) if timings['fast_ms'] else None
+        report[name] = timings
+    return report
+
+
+def _recycle_connections():
+    """
+    Apply ``CONN_MAX_AGE`` and health checks the way a server's
+    request_started/request_finished signals do. The test client skips that,
+    so without this every request would reuse one connection. Inside a test
+    transaction it does nothing.
+    """
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def run_endpoint(scenarios, name, requests, concurrency):
+    """Fire ``requests`` calls at one endpoint from ``concurrency`` threads."""
+    factory = getattr(scenarios, name)
+    lock = threading.Lock()
+    latencies, queries = [], []
+    errors = 0
+
+    def worker(count):
+        nonlocal errors
+        client = Client()
+        local_latencies, local_queries, local_errors = [], [], 0
+        try:
+            for _ in range(count):
+                method, path, data, kwargs = factory()
+                counter = _QueryCounter()
+                started = time.perf_counter()
+                _recycle_connections()
+                with connection.execute_wrapper(counter):
+                    response = getattr(client, method)(path, data, **kwargs)
+                    if response.streaming:
+                        for _ in response.streaming_content:
+                            pass
+                local_latencies.append(time.perf_counter() - started)
+                _recycle_connections()
+                local_queries.append(counter.count)
+                if response.status_code >= 500:
+                    local_errors += 1
+        finally:
+            if concurrency > 1:
+                connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            errors += local_errors
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker(requests)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, [share for share in shares if share]))
+    return summarize(latencies, queries, errors, time.perf_counter() - started)
+
+
+def _asgi_scope(method, path, data, kwargs):
+    content_type = kwargs.get('content_type')
+    if method == 'get':
+        query, body = urlencode(data or {}, doseq=True), b''
+    elif content_type == 'application/json':
+        query, body = '', json.dumps(data).encode()
+    else:
+        content_type = 'application/x-www-form-urlencoded'
+        query, body = '', urlencode(data or {}, doseq=True).encode()
+    headers = [(b'host', b'testserver')]
+    if content_type:
+        headers.append((b'content-type', content_type.encode()))
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method.upper(),
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    return scope, body
+
+
+async def _asgi_request(app, method, path, data, kwargs):
+    """Send one request through ``app`` and return its status code."""
+    scope, body = _asgi_scope(method, path, data, kwargs)
+    sent_body = False
+    status = None
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # Never disconnect; Django cancels this wait once the response is out.
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+def run_endpoint_asgi(scenarios, name, requests, concurrency):
+    """
+    Fire ``requests`` calls at one endpoint through Django's ASGI handler,
+    keeping ``concurrency`` requests in flight on one event loop.
+
+    Queries run on per-request threads this harness cannot hook, so
+    ``queries_per_request`` is not reported; with ``METRICS_ENABLED`` on, the
+    /metrics middleware still counts them.
+    """
+    factory = sync_to_async(getattr(scenarios, name))
+    app = ASGIHandler()
+    latencies = []
+    errors = 0
+
+    async def worker(count):
+        nonlocal errors
+        for _ in range(count):
+            method, path, data, kwargs = await factory()
+            started = time.perf_counter()
+            status = await _asgi_request(app, method, path, data, kwargs)
+            latencies.append(time.perf_counter() - started)
+            if status is None or status >= 500:
+                errors += 1
+
+    async def main():
+        shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+        await asyncio.gather(*(worker(share) for share in shares if share))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return summarize(latencies, [], errors, time.perf_counter() - started)
@@ -0,0 +1,54 @@
+"""
+Database connection and pool statistics for ``/metrics``.
+
+Counts connections opened per alias through Django's ``connection_created``
+signal. When an alias uses the psycopg pool (``pool=1`` in
+``DATABASE_URL``), its live statistics are read as well.
+"""
+import threading
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_opened = {}
+
+
+def _count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] = _opened.get(connection.alias, 0) + 1
+
+
+connection_created.connect(_count_connection, dispatch_uid='accounts.db_pool.count_connection')
+
+
+def opened():
+    """``{alias: connections opened}`` since the process started."""
+    with _lock:
+        return dict(_opened)
+
+
+def pool_gauges(stats):
+    """Normalize psycopg_pool ``get_stats()`` output (zero counters are omitted there)."""
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    return {
+        'in_use': size - available,
+        'idle': available,
+        'max_size': stats.get('pool_max', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'wait_seconds': stats.get('requests_wait_ms', 0) / 1000,
+        'requests': stats.get('requests_num', 0),
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def pools():
+    """``{alias: pool_gauges(...)}`` for every configured alias that is pooled."""
+    found = {}
+    for alias in connections:
+        if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            found[alias] = pool_gauges(pool.get_stats())
+    return found
@@ -0,0 +1,231 @@
+"""
+UPI directory search for payee autocomplete.
+
+Queries match ``upiName`` and ``upiMail`` by prefix and, for queries of three
+or more characters, by trigram similarity, so typos still find the payee.
+Results are ranked exact match first, then prefix matches alphabetically,
+then fuzzy matches by similarity.
+
+On PostgreSQL this is one query served by the ``pg_trgm`` GIN indexes and
+the ``lower()`` prefix indexes from migration 0014. Other databases use
+:class:`MemoryIndex`, an in-process sorted-key and trigram index. It is built
+at server startup by :func:`warm` (``wsgi.py``; a thread in ``asgi.py``)
+and brought up to date before each search with one primary-key range query,
+so new signups from any process show up immediately. Both read from the
+database the router picks, which may be the read replica.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router
+
+from .models import User
+
+MIN_FUZZY_LENGTH = 3
+# Posting-list entries a fuzzy search may read, and candidates it may score.
+FUZZY_SCAN_BUDGET = 20000
+FUZZY_VERIFY_LIMIT = 100
+_WORD = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """The set of ``pg_trgm`` trigrams of ``text``: per lowercased word, padded with two spaces in front and one behind."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """``pg_trgm`` similarity of two trigram sets (shared over total)."""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class MemoryIndex:
+    """
+    In-process index over every user's ``upiName`` and ``upiMail``.
+
+    Prefix matches come from one sorted list of lowercased names and UPI ids
+    (a bisect and a forward scan). Fuzzy matches come from a trigram
+    inverted index, reading the query's posting lists rarest first. A user
+    at the threshold shares at least ``need`` of the query's trigrams, so
+    reading all but ``need - 1`` lists finds every match. Each extra list
+    read raises the shared count a candidate needs. Reads stop at
+    ``FUZZY_SCAN_BUDGET`` postings. When the lists that guarantee a complete
+    answer would exceed that, the search is best effort and keeps the
+    candidates with the most shared trigrams, like PostgreSQL's
+    ``gin_fuzzy_search_limit``. Deleted users and renames are not tracked;
+    restart to drop them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_pk = 0
+        self.entries = []
+        self.sizes = array('H')  # trigram counts of name and UPI id, two per slot
+        self.keys = []
+        self.slots = array('i')
+        self.postings = {}
+
+    def refresh(self):
+        """Index users created since the last call."""
+        rows = User.objects.filter(pk__gt=self.last_pk).order_by('pk').values_list('pk', 'upiName', 'upiMail')
+        self.add(rows.iterator(chunk_size=10000))
+
+    def add(self, rows):
+        """Index ``(pk, upiName, upiMail)`` rows in primary-key order."""
+        added = []
+        for pk, name, mail in rows:
+            slot = len(self.entries)
+            self.entries.append((name, mail))
+            name_grams, mail_grams = trigrams(name), trigrams(mail)
+            self.sizes.extend((min(len(name_grams), 0xFFFF), min(len(mail_grams), 0xFFFF)))
+            for gram in name_grams | mail_grams:
+                self.postings.setdefault(gram, array('i')).append(slot)
+            added.extend((key, slot) for key in {name.lower(), mail.lower()})
+            self.last_pk = pk
+        if len(added) > 64:
+            merged = list(zip(self.keys, self.slots))
+            merged.extend(added)
+            merged.sort()
+            self.keys = [key for key, _ in merged]
+            self.slots = array('i', (slot for _, slot in merged))
+        else:
+            for key, slot in added:
+                position = bisect.bisect(self.keys, key)
+                self.keys.insert(position, key)
+                self.slots.insert(position, slot)
+
+    def _prefix(self, query, limit):
+        found = []
+        for position in range(bisect.bisect_left(self.keys, query), len(self.keys)):
+            if not self.keys[position].startswith(query):
+                break
+            slot = self.slots[position]
+            if slot not in found:
+                found.append(slot)
+                if len(found) == limit:
+                    break
+        return found
+
+    def _fuzzy(self, query, limit, threshold, exclude):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        need = max(1, math.ceil(threshold * len(grams)))
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        read = total = 0
+        for postings in lists:
+            if total + len(postings) > FUZZY_SCAN_BUDGET and read >= 1:
+                break
+            total += len(postings)
+            read += 1
+        counts = Counter()
+        for postings in lists[:read]:
+            counts.update(postings)
+        # Shared trigrams a match must have among the lists read.
+        required = max(1, need - (len(grams) - read))
+        unread = len(grams) - read
+        scored = []
+        top = []  # min-heap of the best ``limit`` scores so far
+        for slot, count in counts.most_common(FUZZY_VERIFY_LIMIT + len(exclude)):
+            # Candidates come by descending count; each can at best share
+            # every unread trigram too.
+            best = count + unread
+            if count < required or (len(top) == limit and min(best, len(grams)) / len(grams) < top[0]):
+                break
+            if slot in exclude:
+                continue
+            if not any(
+                min(best, size) / (len(grams) + size - min(best, size)) >= threshold
+                for size in self.sizes[2 * slot:2 * slot + 2]
+            ):
+                continue
+            name, mail = self.entries[slot]
+            score = max(similarity(grams, trigrams(name)), similarity(grams, trigrams(mail)))
+            if score >= threshold:
+                scored.append((-score, name.lower(), slot))
+                (heapq.heappush if len(top) < limit else heapq.heappushpop)(top, score)
+        scored.sort()
+        return [slot for _, _, slot in scored[:limit]]
+
+    def search(self, query, limit, threshold):
+        with self.lock:
+            self.refresh()
+            slots = self._prefix(query, limit)
+            if len(slots) < limit and len(query) >= MIN_FUZZY_LENGTH:
+                slots += self._fuzzy(query, limit - len(slots), threshold, set(slots))
+            return [self.entries[slot] for slot in slots]
+
+
+_memory_index = MemoryIndex()
+
+_TRIGRAM_SQL = '''
+    SELECT {name}, {mail} FROM (
+        SELECT {name}, {mail},
+            CASE WHEN lower({name}) = %(q)s OR lower({mail}) = %(q)s THEN 0
+                 WHEN lower({name}) LIKE %(prefix)s OR lower({mail}) LIKE %(prefix)s THEN 1
+                 ELSE 2 END AS rank,
+            GREATEST(similarity({name}, %(q)s), similarity({mail}, %(q)s)) AS score
+        FROM {table}
+        WHERE lower({name}) LIKE %(prefix)s OR lower({mail}) LIKE %(prefix)s
+            OR (%(fuzzy)s AND ({name} %% %(q)s OR {mail} %% %(q)s))
+    ) AS matches
+    ORDER BY rank, CASE WHEN rank = 2 THEN score ELSE 0 END DESC, lower({name})
+    LIMIT %(limit)s
+'''
+
+
+def _search_trigram(connection, query, limit):
+    # The fuzzy cutoff is the server's pg_trgm.similarity_threshold (default 0.3).
+    quote = connection.ops.quote_name
+    sql = _TRIGRAM_SQL.format(
+        table=quote(User._meta.db_table),
+        name=quote(User._meta.get_field('upiName').column),
+        mail=quote(User._meta.get_field('upiMail').column),
+    )
+    prefix = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'q': query, 'prefix': prefix, 'fuzzy': len(query) >= MIN_FUZZY_LENGTH, 'limit': limit,
+        })
+        return cursor.fetchall()
+
+
+def warm():
+    """
+    Build the in-memory index ahead of the first search, if this database
+    uses it, so no request pays for the full build. Run once per process at
+    startup; does nothing when ``UPI_DIRECTORY_WARMUP`` is off.
+    """
+    if not settings.UPI_DIRECTORY_WARMUP:
+        return
+    connection = connections[router.db_for_read(User)]
+    if connection.vendor == 'postgresql':
+        return
+    with _memory_index.lock:
+        _memory_index.refresh()
+    # Workers forked after this (gunicorn --preload) open their own connections.
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def search(query, limit=10):
+    """Up to ``limit`` ``(upiName, upiMail)`` pairs matching ``query``, best first."""
+    query = query.strip().lower()
+    if not query:
+        return []
+    connection = connections[router.db_for_read(User)]
+    if connection.vendor == 'postgresql':
+        return _search_trigram(connection, query, limit)
+    return _memory_index.search(query, limit, settings.UPI_SEARCH_SIMILARITY)
@@ -0,0 +1,188 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .archive import month_of
+from .models import AccountMonthlyRollup, Transaction
+from .pagination import before_cursor, cap_legacy, merge_page
+
+SENT_FIELDS = ('id', 'receiver__user__upiName', 'amount', 'timestamp', 'status')
+RECEIVED_FIELDS = ('id', 'sender__user__upiName', 'amount', 'timestamp', 'status')
+
+
+def _side_queryset(account_id, direction, cursor, limit):
+    if direction == 'sent':
+        queryset = Transaction.objects.filter(sender_id=account_id).values(*SENT_FIELDS)
+    else:
+        queryset = Transaction.objects.filter(receiver_id=account_id).values(*RECEIVED_FIELDS)
+    if cursor is not None:
+        queryset = queryset.filter(before_cursor('timestamp', cursor))
+    return queryset.order_by('-timestamp', '-id')[:limit]
+
+
+def _tag(rows, direction):
+    for row in rows:
+        row['type'] = direction
+    return rows
+
+
+def transaction_page(account_id, cursor=None, page_size=50):
+    """
+    One page of an account's sent and received transactions, newest first.
+
+    Each side is read with its own ``(sender|receiver, timestamp, id)`` index
+    range scan limited to ``page_size + 1`` rows, and the two sorted runs are
+    merged in Python, so the cost of a page does not depend on how long the
+    history is. Returns ``(rows, next_cursor)``; ``next_cursor`` is None on
+    the last page.
+    """
+    limit = page_size + 1
+    sent = _tag(list(_side_queryset(account_id, 'sent', cursor, limit)), 'sent')
+    received = _tag(list(_side_queryset(account_id, 'received', cursor, limit)), 'received')
+    return merge_page([sent, received], page_size, 'timestamp')
+
+
+async def atransaction_page(account_id, cursor=None, page_size=50):
+    """Async :func:`transaction_page` for the ASGI read views."""
+    limit = page_size + 1
+    sent = _tag([row async for row in _side_queryset(account_id, 'sent', cursor, limit)], 'sent')
+    received = _tag([row async for row in _side_queryset(account_id, 'received', cursor, limit)], 'received')
+    return merge_page([sent, received], page_size, 'timestamp')
+
+
+def legacy_transactions(account_id, limit):
+    """
+    An account's newest ``limit`` live transactions per direction: the
+    deprecated pre-pagination ``transactions`` shape for app builds that
+    never send ``pageSize`` or a cursor. Returns ``(legacy, truncated)``.
+    """
+    return cap_legacy({
+        direction: _tag(list(_side_queryset(account_id, direction, None, limit + 1)), direction)
+        for direction in ('sent', 'received')
+    }, limit)
+
+
+async def alegacy_transactions(account_id, limit):
+    """Async :func:`legacy_transactions`."""
+    return cap_legacy({
+        direction: _tag([row async for row in _side_queryset(account_id, direction, None, limit + 1)], direction)
+        for direction in ('sent', 'received')
+    }, limit)
+
+
+def serialize_transaction(row):
+    """Merged-feed item for a row returned by :func:`transaction_page`."""
+    counterparty = row.get('receiver__user__upiName', row.get('sender__user__upiName'))
+    return {
+        'id': row['id'],
+        'type': row['type'],
+        'counterparty': counterparty,
+        'amount': row['amount'],
+        'timestamp': row['timestamp'],
+        'status': row['status'],
+    }
+
+
+def page_payload(rows, next_cursor, archived_months=()):
+    return {
+        'items': [serialize_transaction(row) for row in rows],
+        'nextCursor': next_cursor,
+        'hasMore': next_cursor is not None,
+        # Monthly totals of archived transactions; filled on the last page.
+        'archivedMonths': list(archived_months),
+        # `transactions.sent/received` is the pre-pagination shape still read
+        # by older app builds; it carries the same page split by direction.
+        'transactions': {
+            'sent': [row for row in rows if row['type'] == 'sent'],
+            'received': [row for row in rows if row['type'] == 'received']
+        },
+        'status': 'success'
+    }
+
+
+def legacy_payload(legacy, truncated):
+    """Response for callers that do not paginate; see :func:`legacy_transactions`."""
+    return {
+        'transactions': legacy,
+        # More than LEGACY_LISTING_LIMIT rows on either side.
+        'truncated': truncated,
+        'status': 'success'
+    }
+
+
+STATEMENT_COLUMNS = ('id', 'timestamp', 'type', 'counterparty', 'amount', 'status')
+
+
+def _month_start(month):
+    return timezone.make_aware(datetime.combine(month, time.min))
+
+
+def _archived_months_in_range(account_id, start, end, using):
+    """
+    Rollups overlapping ``[start, end)``, oldest first, split into months
+    the range covers whole and months it cuts.
+    """
+    rollups = AccountMonthlyRollup.objects.using(using).filter(account_id=account_id)
+    if start is not None:
+        rollups = rollups.filter(month__gte=month_of(start))
+    if end is not None:
+        rollups = rollups.filter(month__lt=timezone.localtime(end).date())
+    whole, cut = [], []
+    for rollup in rollups.order_by('month'):
+        next_month = (rollup.month + timedelta(days=31)).replace(day=1)
+        covered = (start is None or _month_start(rollup.month) >= start) and (
+            end is None or _month_start(next_month) <= end
+        )
+        (whole if covered else cut).append(rollup)
+    return whole, cut
+
+
+def cut_archived_months(account_id, start=None, end=None, using=None):
+    """
+    ``YYYY-MM`` archived months that ``[start, end)`` only partly covers.
+    Their totals cannot be split by day, so :func:`statement_rows` leaves
+    them out.
+    """
+    if start is None and end is None:
+        return []
+    return [rollup.month.strftime('%Y-%m') for rollup in _archived_months_in_range(account_id, start, end, using)[1]]
+
+
+def statement_rows(account_id, start=None, end=None, chunk_size=2000, using=None):
+    """
+    Yield an account's ledger oldest first as flat statement rows.
+
+    Uses a ``values_list()`` projection with ``iterator(chunk_size=...)`` (a
+    server-side cursor on PostgreSQL) so memory stays constant regardless of
+    history length.
+    ``start`` is inclusive and ``end`` exclusive. Rows are read lazily,
+    after the view has returned, so the database is picked by the caller
+    (``using``) rather than by the router at that point.
+
+    Archived months come first, as an ``archived_sent`` and an
+    ``archived_received`` row per month holding that month's completed
+    totals (no id or counterparty). Only months that lie wholly inside the
+    range are included; see :func:`cut_archived_months` for the others.
+    """
+    whole, _ = _archived_months_in_range(account_id, start, end, using)
+    for rollup in whole:
+        timestamp = _month_start(rollup.month)
+        if rollup.sent_count:
+            yield (None, timestamp, 'archived_sent', None, rollup.sent_total, 'completed')
+        if rollup.received_count:
+            yield (None, timestamp, 'archived_received', None, rollup.received_total, 'completed')
+
+    queryset = Transaction.objects.using(using).filter(Q(sender_id=account_id) | Q(receiver_id=account_id))
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lt=end)
+    queryset = queryset.order_by('timestamp', 'id').values_list(
+        'id', 'timestamp', 'sender_id', 'sender__user__upiName', 'receiver__user__upiName', 'amount', 'status'
+    )
+    for pk, timestamp, sender_id, sender_name, receiver_name, amount, status in queryset.iterator(chunk_size=chunk_size):
+        if sender_id == account_id:
+            yield (pk, timestamp, 'sent', receiver_name, amount, status)
+        else:
+            yield (pk, timestamp, 'received', sender_name, amount, status)
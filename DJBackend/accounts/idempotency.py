@@ -0,0 +1,89 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .responses import JsonResponse
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+def _request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(entry, request_hash):
+    if entry.request_hash != request_hash:
+        return JsonResponse({
+            'error': f'{HEADER} was already used with a different request body',
+            'status': 'error'
+        }, status=422)
+    response = HttpResponse(entry.response_body, status=entry.response_status, content_type='application/json')
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Make a POST view safe to retry with an ``Idempotency-Key`` header.
+
+    The first request claims the key and runs the view in the same database
+    transaction, storing its response; a retry with the same key is answered
+    from that row with one indexed read and never reaches the accounts. A
+    concurrent duplicate blocks on the unique key until the first commits and
+    then replays it. 5xx responses are rolled back and not stored, so the
+    client can retry them. Requests without the header are unaffected.
+    """
+    endpoint = view.__name__
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return JsonResponse({
+                'error': f'{HEADER} must be at most 255 characters',
+                'status': 'error'
+            }, status=400)
+
+        request_hash = _request_hash(request)
+        now = timezone.now()
+        entry = IdempotencyKey.objects.filter(key=key, endpoint=endpoint).first()
+        if entry is not None:
+            if entry.expires_at > now:
+                return _replay(entry, request_hash)
+            entry.delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    entry = IdempotencyKey.objects.create(
+                        key=key,
+                        endpoint=endpoint,
+                        request_hash=request_hash,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+            except IntegrityError:
+                # Lost the race to a concurrent request with the same key.
+                return _replay(IdempotencyKey.objects.get(key=key, endpoint=endpoint), request_hash)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+
+            entry.response_status = response.status_code
+            entry.response_body = response.content.decode()
+            entry.save(update_fields=['response_status', 'response_body'])
+        return response
+
+    return wrapper
@@ -0,0 +1,79 @@
+from django.db.models import Q
+
+from .models import LedgerEntry, UserAccount
+
+DEBIT = LedgerEntry.DEBIT
+CREDIT = LedgerEntry.CREDIT
+
+
+def entries_for(txn, sender_balance, receiver_balance):
+    """Debit and credit for a completed ``txn``, given both balances right after it."""
+    return [
+        LedgerEntry(account_id=txn.sender_id, transaction=txn, direction=DEBIT, amount=txn.amount,
+                    balance_after=sender_balance, created_at=txn.timestamp),
+        LedgerEntry(account_id=txn.receiver_id, transaction=txn, direction=CREDIT, amount=txn.amount,
+                    balance_after=receiver_balance, created_at=txn.timestamp),
+    ]
+
+
+def balance_at(account_id, when):
+    """
+    An account's balance at ``when``.
+
+    This is the ``balance_after`` of the latest entry at or before ``when``,
+    read with one ``(account, created_at, id)`` index lookup. Before an
+    account's first entry it held that entry's opening balance. An account
+    with no entries has only ever held its current balance.
+    """
+    entries = LedgerEntry.objects.filter(account_id=account_id)
+    entry = entries.filter(created_at__lte=when).order_by('-created_at', '-id').first()
+    if entry is not None:
+        return entry.balance_after
+    first = entries.order_by('created_at', 'id').first()
+    if first is not None:
+        return first.balance_after - first.signed_amount
+    return UserAccount.objects.values_list('balance', flat=True).get(pk=account_id)
+
+
+def backfill_ledger(account_model, transaction_model, entry_model, batch_size=500, stdout=None):
+    """
+    Write ledger entries for completed transactions that predate the ledger.
+
+    Accounts with no entries yet are processed in primary-key batches. Each
+    account's history is walked newest first, and the running balance is
+    rebuilt backwards from the account's current balance. Migration 0011
+    runs a frozen copy of this. Returns the number of entries created.
+    """
+    created = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            account_model.objects.filter(pk__gt=last_pk, ledger_entries__isnull=True)
+            .order_by('pk')
+            .values_list('pk', 'balance')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        running = dict(batch)
+
+        history = (
+            transaction_model.objects.filter(status='completed')
+            .filter(Q(sender_id__in=running) | Q(receiver_id__in=running))
+            .order_by('-timestamp', '-id')
+            .values_list('pk', 'sender_id', 'receiver_id', 'amount', 'timestamp')
+        )
+        entries = []
+        for pk, sender_id, receiver_id, amount, timestamp in history.iterator(chunk_size=2000):
+            for account_id, direction, signed in ((sender_id, DEBIT, -amount), (receiver_id, CREDIT, amount)):
+                if account_id in running:
+                    entries.append(entry_model(
+                        account_id=account_id, transaction_id=pk, direction=direction, amount=amount,
+                        balance_after=running[account_id], created_at=timestamp,
+                    ))
+                    running[account_id] -= signed
+        entry_model.objects.bulk_create(entries, batch_size=1000)
+        created += len(entries)
+        if stdout is not None:
+            stdout.write(f'LedgerEntry: backfilled accounts up to pk {last_pk} ({created} entries)')
+    return created
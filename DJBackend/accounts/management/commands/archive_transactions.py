@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.archive import archive, cutoff_for
+
+
+class Command(BaseCommand):
+    help = (
+        'Move transactions older than a cutoff into the archive table in batches, keeping '
+        'per-account monthly rollups. Safe to interrupt and re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=365,
+            help='Archive transactions from before the start of the month this many days ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Transactions moved per database transaction.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches; the next run resumes.')
+        parser.add_argument('--verbose-batches', action='store_true', help='Log progress after every batch.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['older_than_days'] < 0:
+            raise CommandError('--older-than-days must not be negative')
+        cutoff = cutoff_for(options['older_than_days'])
+        started = time.perf_counter()
+        archived, batches = archive(
+            cutoff, options['batch_size'], options['max_batches'],
+            stdout=self.stdout if options['verbose_batches'] else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} transactions before {cutoff:%Y-%m-%d} in {batches} batches '
+            f'({time.perf_counter() - started:.3f}s)'
+        ))
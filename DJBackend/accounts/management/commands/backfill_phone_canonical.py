@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User, OTP
+from accounts.phone import backfill_phone_canonical
+
+
+class Command(BaseCommand):
+    help = 'Fill User.phone_canonical and OTP.phone_canonical in primary-key batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per UPDATE batch.')
+        parser.add_argument('--verbose-batches', action='store_true', help='Log progress after every batch.')
+
+    def handle(self, *args, **options):
+        stdout = self.stdout if options['verbose_batches'] else None
+        users, conflicts = backfill_phone_canonical(User, options['batch_size'], unique=True, stdout=stdout)
+        otps, _ = backfill_phone_canonical(OTP, options['batch_size'], stdout=stdout)
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {users} users and {otps} OTPs'))
+        if conflicts:
+            self.stdout.write(self.style.WARNING(
+                f'{conflicts} users share a canonical phone with another user and were left NULL; '
+                'they are still found through the legacy phone lookup until merged.'
+            ))
@@ -0,0 +1,176 @@
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts import benchmark, directory, routers
+from DJBackend.database import with_params
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed benchmark users into the configured (local!) database and drive every '
+        'accounts endpoint, reporting requests/s, latency percentiles and queries '
+        'per request as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--transactions', type=int, default=5000)
+        parser.add_argument('--money-requests', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads.')
+        parser.add_argument('--endpoints', nargs='*', help='Only run these URL names.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the JSON report to this file.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data afterwards.')
+        parser.add_argument(
+            '--transport', choices=['wsgi', 'asgi', 'compare'], default='wsgi',
+            help='Drive requests through the WSGI test client from threads, the ASGI handler from one '
+                 'event loop, or run both in subprocesses (sync views vs async read views) and compare.',
+        )
+        parser.add_argument(
+            '--connections', choices=['configured', 'compare'], default='configured',
+            help='Use the DATABASE_URL connection settings as they are, or run in subprocesses with a new '
+                 'connection per request, persistent connections and (PostgreSQL with psycopg-pool) '
+                 'the connection pool, and compare latency.',
+        )
+        parser.add_argument(
+            '--serialization', action='store_true',
+            help='Also time encoding full getTransactions/getMoneyRequests pages with the stdlib '
+                 'DjangoJSONEncoder and with the fast encoder the views use.',
+        )
+
+    def handle(self, *args, **options):
+        if options['connections'] == 'compare':
+            return self.compare_connections(options)
+        if options['transport'] == 'compare':
+            return self.compare(options)
+        names = benchmark.endpoint_names()
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - set(names)
+            if unknown:
+                raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+            names = [name for name in names if name in options['endpoints']]
+        if options['users'] < 12:
+            raise CommandError('--users must be at least 12 (bulkTransfer pays 10 distinct receivers)')
+
+        context = benchmark.seed(options['users'], options['transactions'], options['money_requests'], options['seed'])
+        scenarios = benchmark.Scenarios(context, options['seed'])
+        # Servers build the directory index at startup; keep it out of the search latencies.
+        directory.warm()
+        report = {
+            'config': {
+                'database': connection.vendor,
+                'users': options['users'],
+                'transactions': options['transactions'],
+                'money_requests': options['money_requests'],
+                'requests_per_endpoint': options['requests'],
+                'concurrency': options['concurrency'],
+                'transport': options['transport'],
+                'async_read_views': settings.ASYNC_READ_VIEWS,
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'db_pool': bool(connection.settings_dict['OPTIONS'].get('pool')),
+                'read_replica': routers.replica_configured(),
+                'debug': settings.DEBUG,
+                'metrics': settings.METRICS_ENABLED,
+            },
+            'endpoints': {},
+        }
+        # 4xx responses are expected (wrong OTPs, duplicate signups); don't log each one.
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        run = benchmark.run_endpoint_asgi if options['transport'] == 'asgi' else benchmark.run_endpoint
+        try:
+            if options['serialization']:
+                report['serialization'] = benchmark.compare_encoders(context)
+            for name in names:
+                if not hasattr(scenarios, name):
+                    self.stderr.write(f'No benchmark scenario for {name}; skipping')
+                    continue
+                # Views print (e.g. generated OTPs); keep the JSON report clean.
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report['endpoints'][name] = run(
+                        scenarios, name, options['requests'], max(1, options['concurrency'])
+                    )
+        finally:
+            request_logger.setLevel(previous_level)
+            if not options['keep']:
+                benchmark.clear()
+
+        self.write_report(report, options)
+
+    def compare(self, options):
+        """
+        Run the read endpoints once as a WSGI deployment (sync views) and once
+        as an ASGI deployment (async views), each in a fresh process.
+        """
+        report = {}
+        for transport, async_reads in (('wsgi', '0'), ('asgi', '1')):
+            report[transport] = self.run_child(options, transport, {'ASYNC_READ_VIEWS': async_reads}, transport)
+        report['asgi_vs_wsgi_rps'] = {
+            name: round(report['asgi']['endpoints'][name]['rps'] / report['wsgi']['endpoints'][name]['rps'], 2)
+            for name in report['wsgi']['endpoints']
+            if report['wsgi']['endpoints'][name]['rps'] and name in report['asgi']['endpoints']
+        }
+        self.write_report(report, options)
+
+    def compare_connections(self, options):
+        """
+        Run the read endpoints with a new connection per request
+        (``conn_max_age=0``), with persistent connections and, when
+        available, with the psycopg pool. Each run is a fresh process
+        configured through ``DATABASE_URL``.
+        """
+        if options['transport'] == 'compare':
+            raise CommandError('--connections compare needs --transport wsgi or asgi')
+        unpooled = {'pool': None, 'pool_min_size': None, 'pool_max_size': None, 'pool_timeout': None, 'pool_max_idle': None}
+        variants = {
+            'per_request': {**unpooled, 'conn_max_age': 0},
+            'persistent': {**unpooled, 'conn_max_age': 600},
+        }
+        if connection.vendor == 'postgresql' and importlib.util.find_spec('psycopg_pool'):
+            variants['pool'] = {'pool': 1}
+        report = {}
+        for label, params in variants.items():
+            env = {'DATABASE_URL': with_params(settings.DATABASE_URL, **params)}
+            report[label] = self.run_child(options, label, env, options['transport'])
+        report['p50_ms'] = {
+            name: {label: report[label]['endpoints'][name]['latency_ms']['p50'] for label in variants}
+            for name in report['per_request']['endpoints']
+        }
+        self.write_report(report, options)
+
+    def run_child(self, options, label, env, transport):
+        """One benchmark run of the read endpoints in a fresh process with ``env`` applied."""
+        argv = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_api',
+            '--users', str(options['users']),
+            '--transactions', str(options['transactions']),
+            '--money-requests', str(options['money_requests']),
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+            '--seed', str(options['seed']),
+            '--transport', transport,
+            '--endpoints', *(options['endpoints'] or benchmark.READ_ENDPOINTS),
+        ]
+        result = subprocess.run(argv, env=dict(os.environ, **env), capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'{label} run failed:\n{result.stderr}')
+        return json.loads(result.stdout)
+
+    def write_report(self, report, options):
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,49 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset of users, accounts, power-law transaction history '
+        'and money requests for scaling tests and query-plan checks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--transactions', type=int, default=100000, help='Transfers attempted; unaffordable ones are skipped.')
+        parser.add_argument('--money-requests', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for account popularity.')
+        parser.add_argument('--days', type=int, default=365, help='Spread the history over this many days.')
+        parser.add_argument('--opening', type=Decimal, default=Decimal('5000.00'), help='Opening balance of every account.')
+        parser.add_argument('--ledger', action='store_true', help='Also write ledger entries with running balances.')
+        parser.add_argument('--batch-size', type=int, default=50000, help='Rows per COPY or INSERT batch.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('--users must be at least 2')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        started = time.perf_counter()
+        if options['clear']:
+            deleted = synthetic.clear()
+            self.stdout.write(f'Deleted {deleted} rows of earlier synthetic data')
+        summary = synthetic.generate(
+            options['users'], options['transactions'], options['money_requests'], seed=options['seed'],
+            skew=options['skew'], days=options['days'], opening=options['opening'], ledger=options['ledger'],
+            batch_size=options['batch_size'], stdout=self.stdout,
+        )
+        elapsed = time.perf_counter() - started
+        rows = (
+            2 * summary['users'] + summary['transactions'] + summary['ledger_entries'] + summary['money_requests']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {summary['users']} users, {summary['transactions']} transactions "
+            f"({summary['skipped_transactions']} skipped), {summary['ledger_entries']} ledger entries and "
+            f"{summary['money_requests']} money requests in {elapsed:.3f}s ({rows / elapsed:.0f} rows/s)"
+        ))
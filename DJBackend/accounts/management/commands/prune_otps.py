@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import OTP
+
+
+class Command(BaseCommand):
+    help = 'Delete expired OTP rows in primary-key batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows deleted per DELETE statement.')
+        parser.add_argument(
+            '--older-than', type=int, default=None,
+            help='Delete rows created more than this many seconds ago (default: OTP_TTL).',
+        )
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        older_than = options['older_than'] if options['older_than'] is not None else settings.OTP_TTL
+        cutoff = timezone.now() - timedelta(seconds=older_than)
+        # Verified codes can never be used again, so the age cutoff covers them too.
+        expired = OTP.objects.filter(created_at__lt=cutoff).order_by('pk')
+
+        started = time.perf_counter()
+        deleted = batches = 0
+        last_pk = 0
+        while True:
+            ids = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += OTP.objects.filter(pk__in=ids).delete()[0]
+            batches += 1
+            last_pk = ids[-1]
+            if options['sleep'] and len(ids) == options['batch_size']:
+                time.sleep(options['sleep'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} OTPs older than {older_than}s in {batches} batches ({elapsed:.3f}s)'
+        ))
@@ -0,0 +1,46 @@
+import csv
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.reconciliation import OPENING_BALANCE, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Verify every account balance equals the opening balance plus completed credits minus '
+        'completed debits, without locking, and report any drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Accounts per aggregate query.')
+        parser.add_argument('--opening', type=Decimal, default=OPENING_BALANCE, help='Opening balance of every account.')
+        parser.add_argument('--output', help='Write the drift report to this CSV file.')
+        parser.add_argument('--show', type=int, default=20, help='Drifted accounts to print.')
+        parser.add_argument('--verbose-batches', action='store_true', help='Log progress after every chunk.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        started = time.perf_counter()
+        checked, drift = reconcile(
+            options['chunk_size'], options['opening'],
+            stdout=self.stdout if options['verbose_batches'] else None,
+        )
+        elapsed = time.perf_counter() - started
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['account_id', 'balance', 'expected', 'drift'])
+                for pk, balance, expected in drift:
+                    writer.writerow([pk, balance, expected, balance - expected])
+        for pk, balance, expected in drift[:options['show']]:
+            self.stdout.write(f'account {pk}: balance {balance}, expected {expected} (drift {balance - expected})')
+
+        summary = f'Reconciled {checked} accounts in {elapsed:.3f}s'
+        if drift:
+            total = sum(balance - expected for _, balance, expected in drift)
+            raise CommandError(f'{summary}: {len(drift)} accounts drifted (net {total})')
+        self.stdout.write(self.style.SUCCESS(f'{summary}: no drift'))
@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from accounts.benchmark import percentile
+from accounts.models import User, UserAccount, Transaction, LedgerEntry
+from accounts.transfers import transfer, InsufficientBalance
+
+STRESS_DOMAIN = '@stress.bench'
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent transfers at a few hot accounts and verify money is conserved.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=4, help='Number of hot accounts to contend on.')
+        parser.add_argument('--transfers', type=int, default=500, help='Total number of transfers to attempt.')
+        parser.add_argument('--workers', type=int, default=32, help='Number of concurrent worker threads.')
+        parser.add_argument('--max-amount', type=int, default=50, help='Largest single transfer amount.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the transfer plan.')
+        parser.add_argument('--keep', action='store_true', help='Keep the stress accounts after the run.')
+
+    def handle(self, *args, **options):
+        if options['accounts'] < 2:
+            raise CommandError('--accounts must be at least 2')
+
+        account_ids = self.seed_accounts(options['accounts'])
+        rng = random.Random(options['seed'])
+        plan = []
+        for _ in range(options['transfers']):
+            sender_id, receiver_id = rng.sample(account_ids, 2)
+            plan.append((sender_id, receiver_id, Decimal(rng.randint(1, options['max_amount']))))
+
+        opening = dict(UserAccount.objects.filter(pk__in=account_ids).values_list('pk', 'balance'))
+        results = {'ok': 0, 'insufficient': 0, 'errors': 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            local_latencies = []
+            local = {'ok': 0, 'insufficient': 0, 'errors': 0}
+            try:
+                for sender_id, receiver_id, amount in chunk:
+                    started = time.perf_counter()
+                    try:
+                        transfer(sender_id, receiver_id, amount)
+                        local['ok'] += 1
+                    except InsufficientBalance:
+                        local['insufficient'] += 1
+                    except Exception as e:
+                        local['errors'] += 1
+                        self.stderr.write(f'transfer failed: {e}')
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                for key, value in local.items():
+                    results[key] += value
+
+        workers = max(1, options['workers'])
+        threads = [threading.Thread(target=worker, args=(plan[i::workers],)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f"transfers attempted: {len(plan)} with {workers} workers on {len(account_ids)} accounts")
+        self.stdout.write(f"completed: {results['ok']}  insufficient: {results['insufficient']}  errors: {results['errors']}")
+        self.stdout.write(f"elapsed: {elapsed:.3f}s  throughput: {len(plan) / elapsed:.1f} transfers/s")
+        self.stdout.write(
+            'latency ms p50/p95/p99: '
+            + '/'.join(f'{percentile(latencies, p) * 1000:.2f}' for p in (50, 95, 99))
+        )
+
+        try:
+            self.check_conservation(account_ids, opening, results['ok'])
+        finally:
+            if not options['keep']:
+                User.objects.filter(upiMail__endswith=STRESS_DOMAIN).delete()
+
+    def seed_accounts(self, count):
+        User.objects.filter(upiMail__endswith=STRESS_DOMAIN).delete()
+        account_ids = []
+        for i in range(count):
+            user = User.objects.create(
+                phoneNumber=f'+9199{i:08d}',
+                upiName=f'stress{i}',
+                upiMail=f'stress{i}{STRESS_DOMAIN}',
+            )
+            account_ids.append(UserAccount.objects.create(user=user).pk)
+        return account_ids
+
+    def check_conservation(self, account_ids, opening, completed):
+        closing = dict(UserAccount.objects.filter(pk__in=account_ids).values_list('pk', 'balance'))
+        ledger = Transaction.objects.filter(sender_id__in=account_ids, status='completed')
+        sent = dict(ledger.values('sender_id').annotate(total=Sum('amount')).values_list('sender_id', 'total'))
+        received = dict(ledger.values('receiver_id').annotate(total=Sum('amount')).values_list('receiver_id', 'total'))
+        latest = {}
+        for account_id, balance_after in (
+            LedgerEntry.objects.filter(account_id__in=account_ids)
+            .order_by('account_id', 'created_at', 'id')
+            .values_list('account_id', 'balance_after')
+        ):
+            latest[account_id] = balance_after
+
+        problems = []
+        if sum(opening.values()) != sum(closing.values()):
+            problems.append(f'total balance changed from {sum(opening.values())} to {sum(closing.values())}')
+        if ledger.count() != completed:
+            problems.append(f'{ledger.count()} ledger rows for {completed} completed transfers')
+        entries = LedgerEntry.objects.filter(transaction__in=ledger).count()
+        if entries != 2 * completed:
+            problems.append(f'{entries} ledger entries for {completed} completed transfers')
+        for pk in account_ids:
+            expected = opening[pk] - sent.get(pk, 0) + received.get(pk, 0)
+            if closing[pk] != expected:
+                problems.append(f'account {pk}: balance {closing[pk]} but ledger implies {expected}')
+            if pk in latest and latest[pk] != closing[pk]:
+                problems.append(f'account {pk}: balance {closing[pk]} but last ledger entry says {latest[pk]}')
+            if closing[pk] < 0:
+                problems.append(f'account {pk}: negative balance {closing[pk]}')
+
+        if problems:
+            raise CommandError('conservation check failed:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'conservation ok: total balance {sum(closing.values())}'))
@@ -0,0 +1,171 @@
+import bisect
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from . import balance_cache, db_pool
+
+# Upper bounds of the latency buckets, in seconds (100us .. ~100s, x1.5 apart).
+LATENCY_BUCKETS = tuple(0.0001 * 1.5 ** i for i in range(35))
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 50, 100, 200, 500)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with quantile estimates.
+
+    Quantiles are interpolated inside the bucket for continuous values; with
+    ``interpolate=False`` (integer samples such as query counts) the bucket's
+    upper bound is reported instead.
+    """
+
+    def __init__(self, bounds, interpolate=True):
+        self.bounds = bounds
+        self.interpolate = interpolate
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                if not self.interpolate:
+                    return min(upper, self.max)
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class RequestMetrics:
+    """Per-view latency, query-count and DB-time histograms for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self._responses = {}
+
+    def record(self, view, status_code, duration, queries, db_time):
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = (
+                    Histogram(LATENCY_BUCKETS),
+                    Histogram(QUERY_COUNT_BUCKETS, interpolate=False),
+                    Histogram(LATENCY_BUCKETS),
+                )
+            histograms[0].observe(duration)
+            histograms[1].observe(queries)
+            histograms[2].observe(db_time)
+            key = (view, status_code)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def snapshot(self, view):
+        """Quantiles for one view, mostly for tests and ad-hoc inspection."""
+        with self._lock:
+            latency, queries, db_time = self._views[view]
+            return {
+                'count': latency.count,
+                'latency': {q: latency.quantile(q) for q in QUANTILES},
+                'queries': {q: queries.quantile(q) for q in QUANTILES},
+                'db_time': {q: db_time.quantile(q) for q in QUANTILES},
+            }
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            views = sorted(self._views.items())
+            responses = sorted(self._responses.items())
+            for index, (name, help_text) in enumerate((
+                ('echopay_request_duration_seconds', 'Wall time per request by view.'),
+                ('echopay_request_db_queries', 'Database queries per request by view.'),
+                ('echopay_request_db_duration_seconds', 'Database time per request by view.'),
+            )):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} summary')
+                for view, histograms in views:
+                    histogram = histograms[index]
+                    for q in QUANTILES:
+                        lines.append(f'{name}{{view="{view}",quantile="{q}"}} {histogram.quantile(q):.6g}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum:.6g}')
+                    lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+
+            lines.append('# HELP echopay_responses_total Responses by view and status code.')
+            lines.append('# TYPE echopay_responses_total counter')
+            for (view, status_code), count in responses:
+                lines.append(f'echopay_responses_total{{view="{view}",code="{status_code}"}} {count}')
+
+        lines.append('# HELP echopay_db_connections_opened_total Database connections opened by this process.')
+        lines.append('# TYPE echopay_db_connections_opened_total counter')
+        for alias, count in sorted(db_pool.opened().items()):
+            lines.append(f'echopay_db_connections_opened_total{{alias="{alias}"}} {count}')
+        lines.extend(render_pools(db_pool.pools()))
+
+        lines.append('# HELP echopay_balance_cache_total Balance cache lookups and invalidations.')
+        lines.append('# TYPE echopay_balance_cache_total counter')
+        for result, count in sorted(balance_cache.stats().items()):
+            lines.append(f'echopay_balance_cache_total{{result="{result}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_pools(pools):
+    """Prometheus lines for ``{alias: db_pool.pool_gauges(...)}``."""
+    if not pools:
+        return []
+    lines = [
+        '# HELP echopay_db_pool_connections Pooled database connections by state.',
+        '# TYPE echopay_db_pool_connections gauge',
+    ]
+    for alias, gauges in sorted(pools.items()):
+        for state in ('in_use', 'idle'):
+            lines.append(f'echopay_db_pool_connections{{alias="{alias}",state="{state}"}} {gauges[state]}')
+    for name, key, kind, help_text in (
+        ('echopay_db_pool_max_size', 'max_size', 'gauge', 'Configured maximum pool size.'),
+        ('echopay_db_pool_requests_waiting', 'waiting', 'gauge', 'Requests currently waiting for a connection.'),
+        ('echopay_db_pool_wait_seconds_total', 'wait_seconds', 'counter', 'Time spent waiting for a pooled connection.'),
+        ('echopay_db_pool_requests_total', 'requests', 'counter', 'Connections handed out by the pool.'),
+        ('echopay_db_pool_timeouts_total', 'timeouts', 'counter', 'Checkouts that timed out waiting.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for alias, gauges in sorted(pools.items()):
+            lines.append(f'{name}{{alias="{alias}"}} {gauges[key]:.6g}')
+    return lines
+
+
+registry = RequestMetrics()
+
+
+def metrics_view(request):
+    """
+    Prometheus text for this process. 404 unless ``METRICS_ENABLED``; with
+    ``METRICS_TOKEN`` set, 401 without ``Authorization: Bearer <token>``.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain; charset=utf-8')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,82 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import registry
+
+
+class _QueryTimer:
+    """``execute_wrapper`` hook counting queries and their wall time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, query count and DB time per resolved view.
+
+    Results go to the in-process :data:`accounts.metrics.registry` and are
+    served at ``/metrics``. Off by default: unless ``METRICS_ENABLED`` is on,
+    Django drops the middleware entirely. Async-capable, so it does not force
+    the async read views back onto a thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self._watch(stack, timer)
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        stack = ExitStack()
+        # Connections are per thread and the async ORM runs its queries on the
+        # request's thread-sensitive executor, so the wrappers go on there.
+        await sync_to_async(self._watch)(stack, timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    @staticmethod
+    def _watch(stack, timer):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+
+    @staticmethod
+    def _record(request, response, duration, timer):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        if view != 'metrics':
+            registry.record(view, response.status_code, duration, timer.count, timer.duration)
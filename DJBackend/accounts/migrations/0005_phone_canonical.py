@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_otp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otp',
+            name='phone_canonical',
+            field=models.CharField(blank=True, db_index=True, max_length=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_canonical',
+            field=models.CharField(blank=True, max_length=15, null=True, unique=True),
+        ),
+    ]
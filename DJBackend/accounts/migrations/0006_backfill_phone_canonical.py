@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# Frozen copy of accounts.phone.backfill_phone_canonical and
+# canonicalize_phone_number as of this migration, so later changes to the
+# live module cannot change what a fresh migrate writes.
+BATCH_SIZE = 1000
+
+
+def canonicalize(phone):
+    if not phone:
+        return ''
+
+    raw = str(phone).strip().replace(' ', '').replace('-', '')
+    if raw.startswith('+'):
+        digits_only = ''.join(ch for ch in raw[1:] if ch.isdigit())
+    else:
+        digits_only = ''.join(ch for ch in raw if ch.isdigit())
+
+    if not digits_only:
+        return ''
+
+    local = digits_only[-10:] if len(digits_only) >= 10 else digits_only
+    return f'+91{local}' if local else ''
+
+
+def backfill_model(model, unique=False):
+    # With `unique`, rows whose canonical form is already taken stay NULL.
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk, phone_canonical__isnull=True)
+            .order_by('pk')
+            .only('pk', 'phoneNumber')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        for row in batch:
+            row.phone_canonical = canonicalize(row.phoneNumber) or None
+
+        if unique:
+            wanted = {row.phone_canonical for row in batch if row.phone_canonical}
+            taken = set(
+                model.objects.filter(phone_canonical__in=wanted).values_list('phone_canonical', flat=True)
+            )
+            for row in batch:
+                if row.phone_canonical is None:
+                    continue
+                if row.phone_canonical in taken:
+                    row.phone_canonical = None
+                else:
+                    taken.add(row.phone_canonical)
+
+        model.objects.bulk_update([row for row in batch if row.phone_canonical], ['phone_canonical'])
+
+
+def backfill(apps, schema_editor):
+    backfill_model(apps.get_model('accounts', 'User'), unique=True)
+    backfill_model(apps.get_model('accounts', 'OTP'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_phone_canonical'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_backfill_phone_canonical'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['sender', 'timestamp', 'id'], name='txn_sender_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['receiver', 'timestamp', 'id'], name='txn_receiver_ts_idx'),
+        ),
+    ]
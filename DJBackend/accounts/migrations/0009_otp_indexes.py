@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otp',
+            name='phone_canonical',
+            field=models.CharField(blank=True, max_length=15, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['phone_canonical', 'created_at'], name='otp_phone_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['created_at'], name='otp_created_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_otp_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit')], max_length=6)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='accounts.useraccount')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='accounts.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'created_at', 'id'], name='ledger_account_ts_idx')],
+                'constraints': [models.UniqueConstraint(fields=('transaction', 'direction'), name='ledger_txn_direction_uniq'), models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='ledger_amount_positive')],
+            },
+        ),
+    ]
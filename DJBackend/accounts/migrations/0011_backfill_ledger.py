@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Q
+
+# Frozen copy of accounts.ledger.backfill_ledger as of this migration, so
+# later changes to the live module or models cannot break a fresh migrate.
+DEBIT = 'debit'
+CREDIT = 'credit'
+BATCH_SIZE = 500
+
+
+def backfill(apps, schema_editor):
+    UserAccount = apps.get_model('accounts', 'UserAccount')
+    Transaction = apps.get_model('accounts', 'Transaction')
+    LedgerEntry = apps.get_model('accounts', 'LedgerEntry')
+    last_pk = 0
+    while True:
+        batch = list(
+            UserAccount.objects.filter(pk__gt=last_pk, ledger_entries__isnull=True)
+            .order_by('pk')
+            .values_list('pk', 'balance')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        running = dict(batch)
+
+        # Walk each account's history newest first, rebuilding the running
+        # balance backwards from its current balance.
+        history = (
+            Transaction.objects.filter(status='completed')
+            .filter(Q(sender_id__in=running) | Q(receiver_id__in=running))
+            .order_by('-timestamp', '-id')
+            .values_list('pk', 'sender_id', 'receiver_id', 'amount', 'timestamp')
+        )
+        entries = []
+        for pk, sender_id, receiver_id, amount, timestamp in history.iterator(chunk_size=2000):
+            for account_id, direction, signed in ((sender_id, DEBIT, -amount), (receiver_id, CREDIT, amount)):
+                if account_id in running:
+                    entries.append(LedgerEntry(
+                        account_id=account_id, transaction_id=pk, direction=direction, amount=amount,
+                        balance_after=running[account_id], created_at=timestamp,
+                    ))
+                    running[account_id] -= signed
+        LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_backfill_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='moneyrequest',
+            index=models.Index(fields=['requester', 'created_at', 'id'], name='moneyreq_requester_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moneyrequest',
+            index=models.Index(fields=['requestee', 'created_at', 'id'], name='moneyreq_requestee_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moneyrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['requestee', 'created_at', 'id'], name='moneyreq_pending_inbox_idx'),
+        ),
+    ]
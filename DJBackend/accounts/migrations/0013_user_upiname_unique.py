@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_money_request_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='upiName',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# PostgreSQL-only: other databases search through the in-memory index in
+# accounts.directory, so there is nothing to create for them.
+INDEXES = (
+    ('user_upiname_trgm_idx', 'USING gin ("upiName" gin_trgm_ops)'),
+    ('user_upimail_trgm_idx', 'USING gin ("upiMail" gin_trgm_ops)'),
+    ('user_upiname_prefix_idx', '(lower("upiName") text_pattern_ops)'),
+    ('user_upimail_prefix_idx', '(lower("upiMail") text_pattern_ops)'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON accounts_user {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_user_upiname_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
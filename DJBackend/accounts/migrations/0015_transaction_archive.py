@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-18 03:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_upi_directory_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('sent_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('received_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('received_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('timestamp', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], max_length=20)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='transaction',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='accounts.transaction'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['timestamp', 'id'], name='txn_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='accountmonthlyrollup',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='accounts.useraccount'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='receiver',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_received_transactions', to='accounts.useraccount'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sent_transactions', to='accounts.useraccount'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountmonthlyrollup',
+            constraint=models.UniqueConstraint(fields=('account', 'month'), name='rollup_account_month_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['sender', 'timestamp', 'id'], name='archived_txn_sender_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['receiver', 'timestamp', 'id'], name='archived_txn_receiver_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 03:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounterpartyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('spent_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('spent_count', models.PositiveIntegerField(default=0)),
+                ('received_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('received_count', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counterparty_stats', to='accounts.useraccount')),
+                ('counterparty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.useraccount')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'month', '-spent_total'], name='user_cp_stats_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'month', 'counterparty'), name='user_cp_stats_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('spent_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('spent_count', models.PositiveIntegerField(default=0)),
+                ('received_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('received_count', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='accounts.useraccount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'month'), name='user_stats_account_month_uniq')],
+            },
+        ),
+    ]
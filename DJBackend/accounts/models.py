@@ -1,20 +1,34 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 
+from .phone import canonicalize_phone_number
+
 # Create your models here.
 class OTP(models.Model):
     phoneNumber = models.CharField(max_length=15)
+    phone_canonical = models.CharField(max_length=15, null=True, blank=True)
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     is_verified = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Latest code per phone is an index scan; also serves phone-only lookups.
+            models.Index(fields=['phone_canonical', 'created_at'], name='otp_phone_created_idx'),
+            # Range scan for prune_otps.
+            models.Index(fields=['created_at'], name='otp_created_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.phone_canonical = canonicalize_phone_number(self.phoneNumber) or None
+        super().save(*args, **kwargs)
     
     def is_valid(self):
-        """Check if OTP is still valid (within 10 minutes)"""
-        expiry_time = self.created_at + timedelta(minutes=10)
+        """Check if OTP is still valid (within OTP_TTL seconds)"""
+        expiry_time = self.created_at + timedelta(seconds=settings.OTP_TTL)
         return timezone.now() < expiry_time and not self.is_verified
     
     def __str__(self):
@@ -22,8 +36,14 @@ class OTP(models.Model):
 
 class User(models.Model):
     phoneNumber= models.CharField(max_length=15, unique=True)
-    upiName = models.CharField(max_length=100)
+    # +91XXXXXXXXXX form of phoneNumber; the indexed column phone lookups hit.
+    phone_canonical = models.CharField(max_length=15, unique=True, null=True, blank=True)
+    upiName = models.CharField(max_length=100, unique=True)
     upiMail=models.EmailField(max_length=254, unique=True)
+    
+    def save(self, *args, **kwargs):
+        self.phone_canonical = canonicalize_phone_number(self.phoneNumber) or None
+        super().save(*args, **kwargs)
 
 class UserAccount(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -41,9 +61,148 @@ class Transaction(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending')
     
+    class Meta:
+        indexes = [
+            # Keyset pagination of each side of an account's history.
+            models.Index(fields=['sender', 'timestamp', 'id'], name='txn_sender_ts_idx'),
+            models.Index(fields=['receiver', 'timestamp', 'id'], name='txn_receiver_ts_idx'),
+            # Oldest-first batches for archive_transactions.
+            models.Index(fields=['timestamp', 'id'], name='txn_timestamp_idx'),
+        ]
+    
     def __str__(self):
         return f"Transaction from {self.sender.user.upiName} to {self.receiver.user.upiName} - Amount: {self.amount} - Status: {self.status}"
 
+class ArchivedTransaction(models.Model):
+    """
+    A ``Transaction`` older than the archive cutoff, moved here by
+    ``manage.py archive_transactions`` under its original id. Live endpoints
+    never read this table; they use :class:`AccountMonthlyRollup`.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(UserAccount, related_name='archived_sent_transactions', on_delete=models.CASCADE)
+    receiver = models.ForeignKey(UserAccount, related_name='archived_received_transactions', on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    timestamp = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Transaction._meta.get_field('status').choices)
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', 'timestamp', 'id'], name='archived_txn_sender_ts_idx'),
+            models.Index(fields=['receiver', 'timestamp', 'id'], name='archived_txn_receiver_ts_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived transaction {self.id} from account {self.sender_id} to {self.receiver_id} - Amount: {self.amount}"
+
+class AccountMonthlyRollup(models.Model):
+    """
+    Completed archived transactions of one account in one calendar month
+    (``TIME_ZONE``), written in the same database transaction that moves
+    them into :class:`ArchivedTransaction`.
+    """
+    account = models.ForeignKey(UserAccount, related_name='monthly_rollups', on_delete=models.CASCADE)
+    month = models.DateField()  # first day of the month
+    sent_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    received_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    received_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'month'], name='rollup_account_month_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"Account {self.account_id} {self.month:%Y-%m}: sent {self.sent_total}, received {self.received_total}"
+
+class UserMonthlyStats(models.Model):
+    """
+    An account's completed transfers in one calendar month (``TIME_ZONE``),
+    kept up to date by the transfer service in the same database transaction
+    as each transfer. ``manage.py rebuild_user_stats`` recomputes it.
+    """
+    account = models.ForeignKey(UserAccount, related_name='monthly_stats', on_delete=models.CASCADE)
+    month = models.DateField()  # first day of the month
+    spent_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spent_count = models.PositiveIntegerField(default=0)
+    received_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    received_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'month'], name='user_stats_account_month_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"Account {self.account_id} {self.month:%Y-%m}: spent {self.spent_total}, received {self.received_total}"
+
+class UserCounterpartyStats(models.Model):
+    """:class:`UserMonthlyStats` broken down by the other account of each transfer."""
+    account = models.ForeignKey(UserAccount, related_name='counterparty_stats', on_delete=models.CASCADE)
+    month = models.DateField()
+    counterparty = models.ForeignKey(UserAccount, related_name='+', on_delete=models.CASCADE)
+    spent_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spent_count = models.PositiveIntegerField(default=0)
+    received_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    received_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'month', 'counterparty'], name='user_cp_stats_uniq'),
+        ]
+        indexes = [
+            # Top payees of a month is a short index scan.
+            models.Index(fields=['account', 'month', '-spent_total'], name='user_cp_stats_top_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Account {self.account_id} {self.month:%Y-%m} with {self.counterparty_id}: spent {self.spent_total}"
+
+class LedgerEntry(models.Model):
+    """
+    One side of a completed transfer: a debit on the sender and a credit on
+    the receiver, written in the same database transaction as the balance
+    update. Entries are append-only.
+    """
+    DEBIT = 'debit'
+    CREDIT = 'credit'
+    
+    account = models.ForeignKey(UserAccount, related_name='ledger_entries', on_delete=models.CASCADE)
+    # No database constraint: once archived, the transaction lives in
+    # ArchivedTransaction under the same id and its entries stay here.
+    transaction = models.ForeignKey(
+        Transaction, related_name='ledger_entries', on_delete=models.DO_NOTHING, db_constraint=False,
+    )
+    direction = models.CharField(max_length=6, choices=[(DEBIT, 'Debit'), (CREDIT, 'Credit')])
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # The account's balance right after this entry was applied.
+    balance_after = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # Balance at a point in time is the latest entry at or before it.
+            models.Index(fields=['account', 'created_at', 'id'], name='ledger_account_ts_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['transaction', 'direction'], name='ledger_txn_direction_uniq'),
+            models.CheckConstraint(condition=models.Q(amount__gt=0), name='ledger_amount_positive'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger entries are append-only')
+        super().save(*args, **kwargs)
+    
+    @property
+    def signed_amount(self):
+        return -self.amount if self.direction == self.DEBIT else self.amount
+    
+    def __str__(self):
+        return f"{self.direction} {self.amount} on account {self.account_id} -> {self.balance_after}"
+
 class MoneyRequest(models.Model):
     requester = models.ForeignKey(UserAccount, related_name='sent_requests', on_delete=models.CASCADE)
     requestee = models.ForeignKey(UserAccount, related_name='received_requests', on_delete=models.CASCADE)
@@ -64,6 +223,35 @@ class MoneyRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of each side of getMoneyRequests.
+            models.Index(fields=['requester', 'created_at', 'id'], name='moneyreq_requester_ts_idx'),
+            models.Index(fields=['requestee', 'created_at', 'id'], name='moneyreq_requestee_ts_idx'),
+            # The pending inbox and its count stay small however long the history gets.
+            models.Index(
+                fields=['requestee', 'created_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='moneyreq_pending_inbox_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Request from {self.requester.user.upiName} to {self.requestee.user.upiName} - Amount: {self.amount} - Status: {self.status}"
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key on a money-moving endpoint."""
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'endpoint'], name='idempotency_key_endpoint_uniq'),
+        ]
     
     def __str__(self):
-        return f"Request from {self.requester.user.upiName} to {self.requestee.user.upiName} - Amount: {self.amount} - Status: {self.status}"
\ No newline at end of file
+        return f"{self.endpoint} - {self.key} - {self.response_status}"
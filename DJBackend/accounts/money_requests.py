@@ -0,0 +1,256 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MoneyRequest
+from .pagination import before_cursor, cap_legacy, decode_cursor, merge_page, parse_date_range, parse_page_size
+from .transfers import bulk_transfer, BulkTransferFailed
+
+SENT_FIELDS = (
+    'id', 'requestee__user__upiName', 'requestee__user__phoneNumber',
+    'amount', 'message', 'status', 'created_at', 'updated_at',
+)
+RECEIVED_FIELDS = (
+    'id', 'requester__user__upiName', 'requester__user__phoneNumber',
+    'amount', 'message', 'status', 'created_at', 'updated_at',
+)
+DIRECTIONS = ('sent', 'received')
+STATUSES = tuple(value for value, _ in MoneyRequest._meta.get_field('status').choices)
+# Statuses a pending request can be moved to.
+UPDATE_STATUSES = ('approved', 'rejected', 'cancelled')
+
+
+class RequestUpdateError(Exception):
+    """A status change that is not allowed for this request and account."""
+    status_code = 400
+
+
+class RequestNotFound(RequestUpdateError):
+    status_code = 404
+
+
+class NotAllowed(RequestUpdateError):
+    status_code = 403
+
+
+class AlreadyProcessed(RequestUpdateError):
+    pass
+
+
+def _side_queryset(account_id, direction, status, start, end, cursor, limit):
+    if direction == 'sent':
+        queryset = MoneyRequest.objects.filter(requester_id=account_id).values(*SENT_FIELDS)
+    else:
+        queryset = MoneyRequest.objects.filter(requestee_id=account_id).values(*RECEIVED_FIELDS)
+    if status:
+        queryset = queryset.filter(status=status)
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=end)
+    if cursor is not None:
+        queryset = queryset.filter(before_cursor('created_at', cursor))
+    return queryset.order_by('-created_at', '-id')[:limit]
+
+
+def _tag(rows, direction):
+    for row in rows:
+        row['type'] = direction
+    return rows
+
+
+def request_page(account_id, directions=DIRECTIONS, status=None, start=None, end=None, cursor=None, page_size=50):
+    """
+    One page of an account's money requests, newest first.
+
+    ``directions`` picks the sent and/or received side; ``status`` and the
+    ``[start, end)`` window filter both. Each side is one LIMITed range scan
+    on ``(requester|requestee, created_at, id)`` (the pending inbox has its
+    own partial index) merged like :func:`history.transaction_page`. Returns
+    ``(rows, next_cursor)``.
+    """
+    runs = [
+        _tag(list(_side_queryset(account_id, direction, status, start, end, cursor, page_size + 1)), direction)
+        for direction in directions
+    ]
+    return merge_page(runs, page_size, 'created_at')
+
+
+async def arequest_page(account_id, directions=DIRECTIONS, status=None, start=None, end=None, cursor=None, page_size=50):
+    """Async :func:`request_page` for the ASGI read views."""
+    runs = []
+    for direction in directions:
+        queryset = _side_queryset(account_id, direction, status, start, end, cursor, page_size + 1)
+        runs.append(_tag([row async for row in queryset], direction))
+    return merge_page(runs, page_size, 'created_at')
+
+
+def legacy_requests(account_id, limit, directions=DIRECTIONS, status=None, start=None, end=None, **_):
+    """
+    The newest ``limit`` matching requests per direction: the deprecated
+    pre-pagination ``sentRequests``/``receivedRequests`` shape for app builds
+    that never send ``pageSize`` or a cursor. Takes :func:`parse_filters`
+    kwargs; paging ones are ignored. Returns ``(legacy, truncated)``.
+    """
+    return cap_legacy({
+        direction: _tag(list(_side_queryset(account_id, direction, status, start, end, None, limit + 1)), direction)
+        for direction in directions
+    }, limit)
+
+
+async def alegacy_requests(account_id, limit, directions=DIRECTIONS, status=None, start=None, end=None, **_):
+    """Async :func:`legacy_requests`."""
+    runs = {}
+    for direction in directions:
+        queryset = _side_queryset(account_id, direction, status, start, end, None, limit + 1)
+        runs[direction] = _tag([row async for row in queryset], direction)
+    return cap_legacy(runs, limit)
+
+
+def _pending(account_id):
+    return MoneyRequest.objects.filter(requestee_id=account_id, status='pending')
+
+
+def pending_count(account_id):
+    """Pending requests awaiting this account's approval (served by the partial index)."""
+    return _pending(account_id).count()
+
+
+async def apending_count(account_id):
+    return await _pending(account_id).acount()
+
+
+def serialize_request(row):
+    """Merged-feed item for a row returned by :func:`request_page`."""
+    side = 'requestee' if row['type'] == 'sent' else 'requester'
+    return {
+        'id': row['id'],
+        'type': row['type'],
+        'counterparty': row[f'{side}__user__upiName'],
+        'counterpartyPhone': row[f'{side}__user__phoneNumber'],
+        'amount': row['amount'],
+        'message': row['message'],
+        'status': row['status'],
+        'createdAt': row['created_at'],
+        'updatedAt': row['updated_at'],
+    }
+
+
+def parse_filters(params):
+    """``getMoneyRequests`` query parameters as :func:`request_page` kwargs; raises ``ValueError``."""
+    direction = params.get('direction') or None
+    if direction and direction not in DIRECTIONS:
+        raise ValueError('direction must be sent or received')
+    status = params.get('status') or None
+    if status and status not in STATUSES:
+        raise ValueError(f'status must be one of {", ".join(STATUSES)}')
+    start, end = parse_date_range(params.get('from'), params.get('to'))
+    cursor = params.get('cursor')
+    return {
+        'directions': (direction,) if direction else DIRECTIONS,
+        'status': status,
+        'start': start,
+        'end': end,
+        'cursor': decode_cursor(cursor) if cursor else None,
+        'page_size': parse_page_size(params.get('pageSize')),
+    }
+
+
+def page_payload(rows, next_cursor, pending):
+    return {
+        'items': [serialize_request(row) for row in rows],
+        'nextCursor': next_cursor,
+        'hasMore': next_cursor is not None,
+        'pendingCount': pending,
+        # Pre-pagination shape still read by older app builds; same page.
+        'sentRequests': [row for row in rows if row['type'] == 'sent'],
+        'receivedRequests': [row for row in rows if row['type'] == 'received'],
+        'status': 'success'
+    }
+
+
+def legacy_payload(legacy, truncated):
+    """Response for callers that do not paginate; see :func:`legacy_requests`."""
+    return {
+        'sentRequests': legacy.get('sent', []),
+        'receivedRequests': legacy.get('received', []),
+        # More than LEGACY_LISTING_LIMIT rows on either side.
+        'truncated': truncated,
+        'status': 'success'
+    }
+
+
+def check_status_change(money_request, account_id, new_status):
+    """Raise :class:`RequestUpdateError` unless ``account_id`` may set ``new_status``."""
+    if account_id not in (money_request.requester_id, money_request.requestee_id):
+        raise NotAllowed('Unauthorized to update this request')
+    if new_status == 'cancelled' and money_request.requester_id != account_id:
+        raise NotAllowed('Only requester can cancel the request')
+    if new_status in ('approved', 'rejected') and money_request.requestee_id != account_id:
+        raise NotAllowed('Only requestee can approve or reject the request')
+    if money_request.status != 'pending':
+        raise AlreadyProcessed('Request has already been processed')
+
+
+def bulk_update_status(account_id, request_ids, new_status, atomic=True):
+    """
+    Move many pending requests to ``new_status`` on behalf of one account.
+
+    Every request row is locked and checked with one ``SELECT ... FOR UPDATE``
+    in primary-key order. Approvals are all paid by ``account_id``, which is
+    the requestee, through :func:`transfers.bulk_transfer`. That locks the
+    accounts in primary-key order, checks each payment against the running
+    balance, and writes one debit, one CASE credit and bulk-created
+    transactions. The settled requests are then updated with one UPDATE.
+
+    With ``atomic=True`` any failing item rolls back the whole batch and
+    :class:`transfers.BulkTransferFailed` is raised. Otherwise failing items
+    (including payments that run out of balance partway through) stay
+    pending. Returns one result dict per id.
+    """
+    with transaction.atomic():
+        locked = {
+            money_request.pk: money_request
+            for money_request in MoneyRequest.objects.select_for_update()
+            .filter(pk__in=set(request_ids)).order_by('pk')
+        }
+        results, accepted, seen = [], [], set()
+        for index, request_id in enumerate(request_ids):
+            try:
+                if request_id in seen:
+                    raise AlreadyProcessed('Duplicate request id')
+                seen.add(request_id)
+                money_request = locked.get(request_id)
+                if money_request is None:
+                    raise RequestNotFound('Request not found')
+                check_status_change(money_request, account_id, new_status)
+            except RequestUpdateError as e:
+                results.append({'requestId': request_id, 'status': 'failed', 'error': str(e)})
+                continue
+            accepted.append(index)
+            results.append({'requestId': request_id, 'status': new_status, 'amount': money_request.amount})
+
+        if new_status == 'approved' and accepted:
+            payments = [(locked[request_ids[index]].requester_id, results[index]['amount']) for index in accepted]
+            paid = bulk_transfer(account_id, payments, atomic=False)
+            settled = []
+            for index, payment in zip(accepted, paid):
+                if payment['status'] == 'completed':
+                    results[index]['transactionId'] = payment['transactionId']
+                    settled.append(index)
+                else:
+                    results[index] = {'requestId': request_ids[index], 'status': 'failed', 'error': payment['error']}
+            accepted = settled
+
+        failed = len(request_ids) - len(accepted)
+        if atomic and failed:
+            for result in results:
+                if result['status'] != 'failed':
+                    result['status'] = 'not_applied'
+                    result.pop('transactionId', None)
+            raise BulkTransferFailed(f'No requests updated: {failed} item(s) failed', results)
+
+        if accepted:
+            MoneyRequest.objects.filter(pk__in=[request_ids[index] for index in accepted]).update(
+                status=new_status, updated_at=timezone.now()
+            )
+        return results
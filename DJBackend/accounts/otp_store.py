@@ -0,0 +1,107 @@
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import OTP
+
+VERIFIED = 'verified'
+MISSING = 'missing'
+INVALID = 'invalid'
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Too many OTP requests. Try again in {retry_after} seconds.')
+        self.retry_after = retry_after
+
+
+_bucket_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.OTP_CACHE_ALIAS]
+
+
+def _code_key(phone):
+    return f'otp:code:{phone}'
+
+
+def _attempts_key(phone):
+    return f'otp:attempts:{phone}'
+
+
+def _bucket_key(phone):
+    return f'otp:bucket:{phone}'
+
+
+def _take_token(phone):
+    """
+    Token bucket per phone: ``OTP_RATE_LIMIT_BURST`` tokens, refilled at one
+    token every ``OTP_RATE_LIMIT_REFILL_SECONDS``.
+
+    The bucket lives in the cache so it is shared by every worker using the
+    same backend. The read-modify-write is serialized within a process; across
+    processes two simultaneous requests can at worst both spend the same token.
+    """
+    capacity = settings.OTP_RATE_LIMIT_BURST
+    refill = settings.OTP_RATE_LIMIT_REFILL_SECONDS
+    cache = _cache()
+    key = _bucket_key(phone)
+    with _bucket_lock:
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) / refill)
+        if tokens < 1:
+            raise RateLimited(int((1 - tokens) * refill) + 1)
+        # Expire once the bucket would be full again anyway.
+        cache.set(key, (tokens - 1, now), timeout=int(capacity * refill) + 1)
+
+
+def issue(phone):
+    """Rate-limit, generate and store a fresh code for a canonical phone."""
+    _take_token(phone)
+    code = str(secrets.randbelow(900000) + 100000)
+    cache = _cache()
+    cache.set(_code_key(phone), code, timeout=settings.OTP_TTL)
+    cache.delete(_attempts_key(phone))
+    if settings.OTP_AUDIT_ENABLED:
+        OTP.objects.create(phoneNumber=phone, otp=code)
+    return code
+
+
+def _count_attempt(cache, phone):
+    """Record a wrong guess for ``phone``; returns the number of wrong guesses so far."""
+    key = _attempts_key(phone)
+    cache.add(key, 0, timeout=settings.OTP_TTL)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr(): this is the first attempt.
+        cache.add(key, 1, timeout=settings.OTP_TTL)
+        return 1
+
+
+def verify(phone, code):
+    """
+    Check ``code`` for a canonical phone; returns VERIFIED, MISSING or INVALID.
+
+    A code verifies at most once: the winner is whoever deletes the key, and
+    ``cache.delete`` reports whether the key was still there. After
+    ``OTP_MAX_ATTEMPTS`` wrong guesses the code is discarded.
+    """
+    cache = _cache()
+    stored = cache.get(_code_key(phone))
+    if stored is None:
+        return MISSING
+    if not secrets.compare_digest(stored, str(code)):
+        if _count_attempt(cache, phone) >= settings.OTP_MAX_ATTEMPTS:
+            cache.delete(_code_key(phone))
+        return INVALID
+    if not cache.delete(_code_key(phone)):
+        return MISSING
+    if settings.OTP_AUDIT_ENABLED:
+        OTP.objects.filter(phone_canonical=phone, otp=stored, is_verified=False).update(is_verified=True)
+    return VERIFIED
@@ -0,0 +1,106 @@
+import base64
+import heapq
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    """Opaque cursor for the row ``(timestamp, pk)``."""
+    raw = f'{timestamp.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of :func:`encode_cursor`; raises :class:`InvalidCursor`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_page_size(value, default=None):
+    """Clamp a requested page size to ``1..PAGINATION_MAX_PAGE_SIZE``."""
+    default = default or settings.PAGINATION_DEFAULT_PAGE_SIZE
+    try:
+        size = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, settings.PAGINATION_MAX_PAGE_SIZE))
+
+
+def is_paginating(params):
+    """
+    Whether a listing caller pages through results (sends ``cursor`` or
+    ``pageSize``). Callers that do not are older app builds that read only the
+    pre-pagination response fields.
+    """
+    return bool(params.get('cursor') or params.get('pageSize'))
+
+
+def cap_legacy(runs, limit):
+    """
+    Trim ``{direction: rows}`` runs, each read with ``limit + 1`` rows, to
+    ``limit``. Returns ``(runs, truncated)``.
+    """
+    truncated = any(len(rows) > limit for rows in runs.values())
+    return {direction: rows[:limit] for direction, rows in runs.items()}, truncated
+
+
+def before_cursor(field, cursor):
+    """
+    Q for rows strictly after ``cursor`` in ``(field, id)`` descending order.
+
+    Written as ``field < ts OR (field = ts AND id < pk)`` so it can be served
+    by a composite ``(owner, field, id)`` index range scan.
+    """
+    timestamp, pk = cursor
+    return Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+
+
+def merge_page(runs, page_size, field):
+    """
+    Merge runs already sorted by ``(field, id)`` descending into one page.
+
+    Each run must hold up to ``page_size + 1`` rows so the merge can tell
+    whether another page follows. Returns ``(rows, next_cursor)``.
+    """
+    merged = list(heapq.merge(
+        *runs, key=lambda row: (row[field], row['id']), reverse=True
+    ))[:page_size + 1]
+
+    next_cursor = None
+    if len(merged) > page_size:
+        merged = merged[:page_size]
+        last = merged[-1]
+        next_cursor = encode_cursor(last[field], last['id'])
+    return merged, next_cursor
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value}')
+    return timezone.make_aware(datetime.combine(parsed, datetime.min.time()))
+
+
+def parse_date_range(start, end):
+    """
+    ``from``/``to`` calendar dates (both inclusive, either optional) as an
+    aware ``[start, end)`` datetime range; raises ``ValueError``.
+    """
+    start, end = _parse_day(start), _parse_day(end)
+    if end is not None:
+        end += timedelta(days=1)
+    return start, end
@@ -0,0 +1,94 @@
+def get_phone_candidates(phone):
+    """Return lookup candidates for phone numbers across +91/91/10-digit formats."""
+    if not phone:
+        return []
+
+    raw = str(phone).strip().replace(' ', '').replace('-', '')
+    if raw.startswith('+'):
+        digits = ''.join(ch for ch in raw[1:] if ch.isdigit())
+    else:
+        digits = ''.join(ch for ch in raw if ch.isdigit())
+
+    if not digits:
+        return [raw]
+
+    if len(digits) >= 10:
+        local = digits[-10:]
+    else:
+        local = digits
+
+    candidates = {
+        raw,
+        digits,
+        local,
+        f'+{digits}',
+        f'+91{local}',
+        f'91{local}',
+    }
+    return list(candidates)
+
+
+def canonicalize_phone_number(phone):
+    """Canonical phone format used for writes: +91XXXXXXXXXX"""
+    if not phone:
+        return ''
+
+    raw = str(phone).strip().replace(' ', '').replace('-', '')
+    if raw.startswith('+'):
+        digits_only = ''.join(ch for ch in raw[1:] if ch.isdigit())
+    else:
+        digits_only = ''.join(ch for ch in raw if ch.isdigit())
+
+    if not digits_only:
+        return ''
+
+    local = digits_only[-10:] if len(digits_only) >= 10 else digits_only
+    return f'+91{local}' if local else ''
+
+
+def backfill_phone_canonical(model, batch_size=1000, unique=False, stdout=None):
+    """
+    Fill ``phone_canonical`` for rows of ``model`` where it is still NULL.
+
+    Walks the table in primary-key batches so each UPDATE stays short. With
+    ``unique=True`` a row whose canonical form is already taken (legacy
+    duplicates such as ``9000000001`` and ``+919000000001``) is left NULL and
+    counted as a conflict; such rows stay reachable through the legacy
+    candidate lookup. Works with historical models inside migrations.
+    Returns ``(updated, conflicts)``.
+    """
+    updated = conflicts = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk, phone_canonical__isnull=True)
+            .order_by('pk')
+            .only('pk', 'phoneNumber')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        for row in batch:
+            row.phone_canonical = canonicalize_phone_number(row.phoneNumber) or None
+
+        if unique:
+            wanted = {row.phone_canonical for row in batch if row.phone_canonical}
+            taken = set(
+                model.objects.filter(phone_canonical__in=wanted).values_list('phone_canonical', flat=True)
+            )
+            for row in batch:
+                if row.phone_canonical is None:
+                    continue
+                if row.phone_canonical in taken:
+                    row.phone_canonical = None
+                    conflicts += 1
+                else:
+                    taken.add(row.phone_canonical)
+
+        to_update = [row for row in batch if row.phone_canonical]
+        model.objects.bulk_update(to_update, ['phone_canonical'])
+        updated += len(to_update)
+        if stdout is not None:
+            stdout.write(f'{model.__name__}: backfilled up to pk {last_pk} ({updated} rows)')
+    return updated, conflicts
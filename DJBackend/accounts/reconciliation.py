@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .archive import rollup_totals
+from .models import UserAccount, Transaction
+
+OPENING_BALANCE = Decimal(str(UserAccount._meta.get_field('balance').default))
+CENT = Decimal('0.01')
+
+
+def _totals(transactions, column):
+    """``{account_id: total}`` computed with a database-side GROUP BY."""
+    return dict(
+        transactions.values(column).annotate(total=Sum('amount')).order_by().values_list(column, 'total')
+    )
+
+
+def _compare(balances, debits, credits, rollups, opening):
+    for pk, balance in balances:
+        archived_sent, archived_received = rollups.get(pk, (0, 0))
+        expected = (
+            opening + credits.get(pk, 0) + archived_received - debits.get(pk, 0) - archived_sent
+        ).quantize(CENT)
+        if balance != expected:
+            yield pk, balance, expected
+
+
+def reconcile(chunk_size=10000, opening=OPENING_BALANCE, stdout=None):
+    """
+    Check every ``UserAccount.balance`` against ``opening`` plus completed
+    credits minus completed debits. Archived transactions count through
+    their monthly rollups.
+
+    Accounts are read in primary-key chunks. For each chunk the two sides are
+    summed per account with a GROUP BY over the chunk's id range, which is an
+    index range scan on ``(sender|receiver, ...)``, and compared in memory. So
+    memory stays bounded by the chunk size. Nothing is locked. A transfer that
+    commits between a chunk's reads can look like drift, so suspects are
+    checked a second time and only accounts that still disagree are
+    reported. Returns ``(accounts_checked, [(account_id, balance, expected)])``.
+    """
+    completed = Transaction.objects.filter(status='completed')
+    checked = 0
+    suspects = []
+    last_pk = 0
+    while True:
+        balances = list(
+            UserAccount.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'balance')[:chunk_size]
+        )
+        if not balances:
+            break
+        low, last_pk = balances[0][0], balances[-1][0]
+        debits = _totals(completed.filter(sender_id__gte=low, sender_id__lte=last_pk), 'sender_id')
+        credits = _totals(completed.filter(receiver_id__gte=low, receiver_id__lte=last_pk), 'receiver_id')
+        rollups = rollup_totals(low=low, high=last_pk)
+        suspects.extend(pk for pk, _, _ in _compare(balances, debits, credits, rollups, opening))
+        checked += len(balances)
+        if stdout is not None:
+            stdout.write(f'checked accounts up to pk {last_pk} ({checked} accounts, {len(suspects)} suspects)')
+
+    drift = []
+    for start in range(0, len(suspects), chunk_size):
+        ids = suspects[start:start + chunk_size]
+        balances = UserAccount.objects.filter(pk__in=ids).order_by('pk').values_list('pk', 'balance')
+        debits = _totals(completed.filter(sender_id__in=ids), 'sender_id')
+        credits = _totals(completed.filter(receiver_id__in=ids), 'receiver_id')
+        drift.extend(_compare(balances, debits, credits, rollup_totals(ids), opening))
+    return checked, drift
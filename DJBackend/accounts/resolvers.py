@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db.models import Q
+
+from .models import User, UserAccount
+from .phone import canonicalize_phone_number, get_phone_candidates
+
+
+class ResolutionError(Exception):
+    """A phone number or UPI id that did not resolve to an account."""
+    status_code = 404
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.key = key
+
+
+class UserNotFound(ResolutionError):
+    pass
+
+
+class AccountMissing(ResolutionError):
+    """The user exists but has no UserAccount."""
+
+
+class AccountResolver:
+    """
+    Resolve any mix of phone numbers and UPI ids to ``UserAccount`` objects.
+
+    Everything is fetched with one ``select_related('user')`` query up front;
+    the per-key accessors then read from memory. Misses raise
+    :class:`UserNotFound` or :class:`AccountMissing` and only those pay for
+    extra queries (legacy phone formats, telling the two cases apart).
+    """
+
+    def __init__(self, phones=(), upi_ids=()):
+        self._by_phone = {}
+        self._by_upi = {}
+        canonical = {canonicalize_phone_number(phone) for phone in phones} - {''}
+        upi_ids = {upi_id for upi_id in upi_ids if upi_id}
+        if not canonical and not upi_ids:
+            return
+        accounts = (
+            UserAccount.objects.select_related('user')
+            .filter(Q(user__phone_canonical__in=canonical) | Q(user__upiMail__in=upi_ids))
+            .order_by('pk')
+        )
+        for account in accounts:
+            self._by_phone.setdefault(account.user.phone_canonical, account)
+            self._by_upi.setdefault(account.user.upiMail, account)
+
+    def phone(self, phone):
+        canonical = canonicalize_phone_number(phone)
+        account = self._by_phone.get(canonical)
+        if account is not None:
+            return account
+        if canonical and settings.PHONE_LOOKUP_LEGACY_FALLBACK:
+            account = (
+                UserAccount.objects.select_related('user')
+                .filter(user__phoneNumber__in=get_phone_candidates(phone))
+                .order_by('pk')
+                .first()
+            )
+            if account is not None:
+                self._by_phone[canonical] = account
+                return account
+        if canonical and User.objects.filter(phone_canonical=canonical).exists():
+            raise AccountMissing(phone)
+        raise UserNotFound(phone)
+
+    def upi(self, upi_id):
+        account = self._by_upi.get(upi_id)
+        if account is not None:
+            return account
+        if upi_id and User.objects.filter(upiMail=upi_id).exists():
+            raise AccountMissing(upi_id)
+        raise UserNotFound(upi_id)
+
+
+def resolve_phone(phone):
+    """Single-phone shortcut for :class:`AccountResolver`."""
+    return AccountResolver(phones=[phone]).phone(phone)
+
+
+async def aresolve_phone(phone):
+    """Async :func:`resolve_phone` for the ASGI read views."""
+    canonical = canonicalize_phone_number(phone)
+    if canonical:
+        accounts = UserAccount.objects.select_related('user').order_by('pk')
+        account = await accounts.filter(user__phone_canonical=canonical).afirst()
+        if account is None and settings.PHONE_LOOKUP_LEGACY_FALLBACK:
+            account = await accounts.filter(user__phoneNumber__in=get_phone_candidates(phone)).afirst()
+        if account is not None:
+            return account
+        if await User.objects.filter(phone_canonical=canonical).aexists():
+            raise AccountMissing(phone)
+    raise UserNotFound(phone)
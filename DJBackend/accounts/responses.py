@@ -0,0 +1,73 @@
+"""
+JSON responses for the accounts API.
+
+:func:`dumps` encodes with orjson when it is installed and falls back to the
+standard library otherwise; both produce the same bytes. ``Decimal`` values
+are written as strings (``"5000.00"``), aware datetimes as RFC 3339 with
+microseconds and ``Z`` for UTC, and any other iterable (``.values()``
+querysets, generators) as an array, so views can hand over query results
+without copying them into lists first.
+"""
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _isoformat(value):
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+class StdlibEncoder(DjangoJSONEncoder):
+    """The fallback encoder: ``DjangoJSONEncoder`` with orjson's datetime format."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return _isoformat(o)
+        if isinstance(o, datetime.time):
+            return o.isoformat()
+        try:
+            return super().default(o)
+        except TypeError:
+            if hasattr(o, '__iter__') and not isinstance(o, (str, bytes)):
+                return list(o)
+            raise
+
+
+_stdlib_default = StdlibEncoder().default
+
+
+def _default(o):
+    # orjson handles str, int, float, dict, list, datetime, date, time and
+    # UUID natively; everything else comes through here.
+    if isinstance(o, Decimal):
+        return str(o)
+    return _stdlib_default(o)
+
+
+def dumps_stdlib(data):
+    return json.dumps(data, cls=StdlibEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+if orjson is not None:
+    def dumps(data):
+        """``data`` as UTF-8 JSON bytes."""
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+else:
+    dumps = dumps_stdlib
+
+
+class JsonResponse(HttpResponse):
+    """``django.http.JsonResponse`` encoded with :func:`dumps`."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
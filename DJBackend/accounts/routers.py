@@ -0,0 +1,86 @@
+"""
+Read-replica routing.
+
+When a ``replica`` database is configured (``REPLICA_DATABASE_URL``), views
+wrapped in :func:`replica_reads` send their ORM reads to it. These are the
+search, profile, history and money-request listing endpoints. Everything
+else, including every write, goes to ``default``. Reads stay on the primary:
+
+- after the same request has written anything, so a view reads its own
+  writes;
+- inside ``transaction.atomic()`` on the primary, so locked rows and the
+  rows read beside them agree.
+
+Balances are never read from the replica: ``getBalance`` and the transfer
+and request endpoints are not wrapped.
+"""
+import contextvars
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+
+class _Scope:
+    """A request that may read from the replica; ``pinned`` once it has written."""
+
+    def __init__(self):
+        self.pinned = False
+
+
+# The scope object is shared with the threads the async ORM runs queries in
+# (they get a copy of the context), so a write there pins the whole request.
+_scope = contextvars.ContextVar('replica_scope', default=None)
+
+
+def replica_configured():
+    return REPLICA in connections.settings
+
+
+def replica_reads(view):
+    """Route the ORM reads of a sync or async view to the replica, if one is configured."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _scope.set(_Scope())
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _scope.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _scope.set(_Scope())
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _scope.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """``DATABASE_ROUTERS`` entry that implements :func:`replica_reads`."""
+
+    def db_for_read(self, model, **hints):
+        scope = _scope.get()
+        if scope is None or not replica_configured():
+            return None
+        if scope.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        scope = _scope.get()
+        if scope is not None:
+            scope.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so objects read from the replica
+        # can be related to objects on the primary.
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
@@ -0,0 +1,283 @@
+"""
+Synthetic dataset generator for scaling tests.
+
+Writes users, accounts, a power-law distributed transaction history (with
+optional ledger entries) and money requests in mixed states, straight into
+the tables in large batches: ``COPY`` on PostgreSQL (psycopg 3 or
+psycopg2), multi-row ``executemany`` inserts elsewhere. Runs are
+deterministic for a given seed.
+Account balances and the monthly analytics always agree with the generated
+history. A transfer the sender could not afford is skipped, as the live
+transfer service would reject it. Used by ``manage.py generate_dataset`` and
+:func:`accounts.benchmark.seed`.
+"""
+import bisect
+import csv
+import io
+import itertools
+import random
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import analytics
+from .models import (
+    User, UserAccount, Transaction, MoneyRequest, LedgerEntry, ArchivedTransaction, AccountMonthlyRollup,
+    UserMonthlyStats, UserCounterpartyStats,
+)
+
+DOMAIN = '@synthetic.upi'
+PHONE_PREFIX = '+9166'
+NAME_PREFIX = 'synthetic'
+REQUEST_STATUSES = ('pending', 'approved', 'rejected', 'cancelled')
+REQUEST_STATUS_WEIGHTS = (30, 40, 20, 10)
+MESSAGES = ('rent', 'dinner', 'tickets', 'groceries', 'fuel', 'gift', 'loan')
+
+
+def _columns(model, names):
+    return [model._meta.get_field(name).column for name in names]
+
+
+def _copy_driver():
+    """``'psycopg'`` or ``'psycopg2'`` when rows can be sent with ``COPY``, else None."""
+    if connection.vendor != 'postgresql':
+        return None
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return 'psycopg' if is_psycopg3 else 'psycopg2'
+
+
+class _Writer:
+    """Append rows of column values to tables in batches."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.copy = _copy_driver()
+        self.adapt_datetime = connection.ops.adapt_datetimefield_value
+
+    def write(self, model, fields, rows):
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in _columns(model, fields))
+        written = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return written
+            with transaction.atomic(), connection.cursor() as cursor:
+                if self.copy == 'psycopg':
+                    with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                        for row in batch:
+                            copy.write_row(row)
+                elif self.copy == 'psycopg2':
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(batch)
+                    buffer.seek(0)
+                    cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+                else:
+                    placeholders = ', '.join(['%s'] * len(fields))
+                    cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', batch)
+            written += len(batch)
+
+    def reset_sequences(self, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def _sampler(rng, n, skew):
+    """Draw account indexes with Zipf(``skew``) popularity over a random ranking."""
+    ranking = array('q', range(n))
+    rng.shuffle(ranking)
+    cumulative = array('d', itertools.accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+    total = cumulative[-1]
+
+    def sample():
+        return ranking[min(n - 1, bisect.bisect(cumulative, rng.random() * total))]
+    return sample
+
+
+def _amount_cents(rng):
+    return max(100, min(2_000_000, int(rng.lognormvariate(5, 1) * 100)))
+
+
+def _money(cents):
+    return f'{cents // 100}.{cents % 100:02d}'
+
+
+def _transfers(users, count, seed, skew, opening_cents):
+    """
+    Yield ``(sender, receiver, cents, balances)`` for each applied transfer,
+    with both senders and receivers drawn from a power law. ``balances``
+    holds every account's running balance in cents right after the transfer.
+    """
+    rng = random.Random(f'{seed}-transactions')
+    pick = _sampler(rng, users, skew)
+    balances = array('q', [opening_cents]) * users
+    for _ in range(count):
+        sender, receiver = pick(), pick()
+        while receiver == sender:
+            receiver = pick()
+        cents = _amount_cents(rng)
+        if balances[sender] < cents:
+            yield None
+            continue
+        balances[sender] -= cents
+        balances[receiver] += cents
+        yield sender, receiver, cents, balances
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def generate(users, transactions, money_requests, seed=0, skew=1.1, days=365,
+             opening=Decimal('5000.00'), ledger=False, batch_size=50000,
+             phone_prefix=PHONE_PREFIX, name_prefix=NAME_PREFIX, domain=DOMAIN, stdout=None):
+    """
+    Generate ``users`` users with accounts, ``transactions`` attempted
+    transfers and ``money_requests`` requests. User ``i`` gets the phone
+    ``{phone_prefix}{i:08d}`` and the UPI id ``{name_prefix}{i}{domain}``.
+
+    Primary keys are assigned here, so foreign keys need no read-back. The
+    transfer plan is replayed twice: once to find closing balances, so
+    accounts are inserted final, and once to write the history. Returns a
+    summary dict.
+    """
+    if users < 2:
+        raise ValueError('users must be at least 2')
+    writer = _Writer(batch_size)
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    opening_cents = int(opening * 100)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    user_base = _next_id(User)
+    account_base = _next_id(UserAccount)
+    txn_base = _next_id(Transaction)
+    entry_base = _next_id(LedgerEntry)
+    request_base = _next_id(MoneyRequest)
+
+    closing = array('q', [opening_cents]) * users
+    skipped = 0
+    for step in _transfers(users, transactions, seed, skew, opening_cents):
+        if step is None:
+            skipped += 1
+        else:
+            closing = step[3]
+
+    writer.write(User, ('id', 'phoneNumber', 'phone_canonical', 'upiName', 'upiMail'), (
+        (user_base + i, f'{phone_prefix}{i:08d}', f'{phone_prefix}{i:08d}', f'{name_prefix}{i}',
+         f'{name_prefix}{i}{domain}')
+        for i in range(users)
+    ))
+    log(f'users: {users}')
+    opened, updated = writer.adapt_datetime(start), writer.adapt_datetime(now)
+    writer.write(UserAccount, ('id', 'user', 'balance', 'created_at', 'updated_at'), (
+        (account_base + i, user_base + i, _money(closing[i]), opened, updated)
+        for i in range(users)
+    ))
+    log(f'accounts: {users}')
+
+    applied = transactions - skipped
+    step_seconds = days * 86400 / max(applied, 1)
+    entries = []
+
+    def history():
+        index = 0
+        for step in _transfers(users, transactions, seed, skew, opening_cents):
+            if step is None:
+                continue
+            sender, receiver, cents, balances = step
+            txn_id = txn_base + index
+            timestamp = writer.adapt_datetime(start + timedelta(seconds=index * step_seconds))
+            if ledger:
+                amount = _money(cents)
+                entries.append((entry_base + 2 * index, account_base + sender, txn_id, LedgerEntry.DEBIT,
+                                amount, _money(balances[sender]), timestamp))
+                entries.append((entry_base + 2 * index + 1, account_base + receiver, txn_id, LedgerEntry.CREDIT,
+                                amount, _money(balances[receiver]), timestamp))
+            index += 1
+            yield txn_id, account_base + sender, account_base + receiver, _money(cents), timestamp, 'completed'
+
+    txn_fields = ('id', 'sender', 'receiver', 'amount', 'timestamp', 'status')
+    entry_fields = ('id', 'account', 'transaction', 'direction', 'amount', 'balance_after', 'created_at')
+    rows = history()
+    written = entries_written = 0
+    while True:
+        # Interleave so the entries buffer never outgrows one batch.
+        chunk = writer.write(Transaction, txn_fields, itertools.islice(rows, batch_size))
+        if not chunk:
+            break
+        written += chunk
+        if entries:
+            entries_written += writer.write(LedgerEntry, entry_fields, entries)
+            entries.clear()
+        log(f'transactions: {written}/{applied}')
+
+    rng = random.Random(f'{seed}-requests')
+    pick = _sampler(rng, users, skew)
+
+    def requests():
+        for i in range(money_requests):
+            requester, requestee = pick(), pick()
+            while requestee == requester:
+                requestee = pick()
+            created = writer.adapt_datetime(start + timedelta(seconds=rng.random() * days * 86400))
+            status = rng.choices(REQUEST_STATUSES, REQUEST_STATUS_WEIGHTS)[0]
+            yield (request_base + i, account_base + requester, account_base + requestee,
+                   _money(_amount_cents(rng)), rng.choice(MESSAGES), status, created, created)
+
+    writer.write(MoneyRequest, ('id', 'requester', 'requestee', 'amount', 'message', 'status', 'created_at', 'updated_at'),
+                 requests())
+    log(f'money requests: {money_requests}')
+    writer.reset_sequences([User, UserAccount, Transaction, LedgerEntry, MoneyRequest])
+    _, stats_rows = analytics.rebuild(low=account_base, high=account_base + users - 1)
+    log(f'monthly stats: {stats_rows}')
+
+    return {
+        'users': users,
+        'account_ids': range(account_base, account_base + users),
+        'transactions': written,
+        'skipped_transactions': skipped,
+        'ledger_entries': entries_written,
+        'money_requests': money_requests,
+        'monthly_stats': stats_rows,
+    }
+
+
+def clear(domain=DOMAIN, batch_size=5000):
+    """Delete generated users and everything hanging off them, in primary-key batches."""
+    accounts = UserAccount.objects.filter(user__upiMail__endswith=domain).values('pk')
+    querysets = (
+        LedgerEntry.objects.filter(account__in=accounts),
+        MoneyRequest.objects.filter(requester__in=accounts),
+        MoneyRequest.objects.filter(requestee__in=accounts),
+        Transaction.objects.filter(sender__in=accounts),
+        Transaction.objects.filter(receiver__in=accounts),
+        ArchivedTransaction.objects.filter(sender__in=accounts),
+        ArchivedTransaction.objects.filter(receiver__in=accounts),
+        AccountMonthlyRollup.objects.filter(account__in=accounts),
+        UserCounterpartyStats.objects.filter(account__in=accounts),
+        UserCounterpartyStats.objects.filter(counterparty__in=accounts),
+        UserMonthlyStats.objects.filter(account__in=accounts),
+        UserAccount.objects.filter(user__upiMail__endswith=domain),
+        User.objects.filter(upiMail__endswith=domain),
+    )
+    deleted = 0
+    for queryset in querysets:
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+    return deleted
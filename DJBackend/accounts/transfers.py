@@ -0,0 +1,199 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from . import analytics, balance_cache
+from .ledger import entries_for
+from .models import UserAccount, Transaction, LedgerEntry
+
+
+class TransferError(Exception):
+    """Base class for transfers that could not be applied."""
+    status_code = 400
+
+
+class InvalidAmount(TransferError):
+    pass
+
+
+class SameAccount(TransferError):
+    pass
+
+
+class InsufficientBalance(TransferError):
+    pass
+
+
+class AccountNotFound(TransferError):
+    status_code = 404
+
+
+def parse_amount(value):
+    """Parse a request amount into a positive two-place Decimal."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise InvalidAmount('Invalid amount')
+    if not amount.is_finite() or amount <= 0:
+        raise InvalidAmount('Amount must be greater than zero')
+    if amount != amount.quantize(Decimal('0.01')):
+        raise InvalidAmount('Amount cannot have more than two decimal places')
+    return amount
+
+
+def lock_accounts(account_ids):
+    """
+    Lock the given accounts for the rest of the current atomic block.
+
+    Rows are always locked in primary-key order so two transfers touching the
+    same pair of accounts in opposite directions cannot deadlock.
+    """
+    ids = sorted(set(account_ids))
+    return {
+        account.pk: account
+        for account in UserAccount.objects.select_for_update().filter(pk__in=ids).order_by('pk')
+    }
+
+
+def transfer(sender_account_id, receiver_account_id, amount):
+    """
+    Move ``amount`` from one account to another and record the ledger rows.
+
+    Both balance updates, the ``Transaction`` insert and its debit/credit
+    ``LedgerEntry`` pair happen in one database transaction with the two
+    account rows locked, so concurrent transfers can neither lose updates nor
+    overdraw an account, and the ledger's running balances always agree with
+    ``UserAccount.balance``. The monthly analytics are updated in the same
+    transaction. Returns the new ``Transaction``.
+    """
+    amount = parse_amount(amount)
+    if sender_account_id == receiver_account_id:
+        raise SameAccount('Cannot send money to the same account')
+
+    with transaction.atomic():
+        accounts = lock_accounts([sender_account_id, receiver_account_id])
+        if sender_account_id not in accounts:
+            raise AccountNotFound('Sender account not found')
+        if receiver_account_id not in accounts:
+            raise AccountNotFound('Receiver account not found')
+
+        if accounts[sender_account_id].balance < amount:
+            raise InsufficientBalance('Insufficient balance')
+
+        now = timezone.now()
+        UserAccount.objects.filter(pk=sender_account_id).update(
+            balance=F('balance') - amount, updated_at=now
+        )
+        UserAccount.objects.filter(pk=receiver_account_id).update(
+            balance=F('balance') + amount, updated_at=now
+        )
+        balance_cache.invalidate([sender_account_id, receiver_account_id])
+        txn = Transaction.objects.create(
+            sender_id=sender_account_id,
+            receiver_id=receiver_account_id,
+            amount=amount,
+            status='completed'
+        )
+        LedgerEntry.objects.bulk_create(entries_for(
+            txn,
+            accounts[sender_account_id].balance - amount,
+            accounts[receiver_account_id].balance + amount,
+        ))
+        analytics.record([(sender_account_id, receiver_account_id, amount, txn.timestamp)])
+        return txn
+
+
+class BulkTransferFailed(TransferError):
+    """Raised in all-or-nothing mode; ``results`` holds the per-item outcome."""
+
+    def __init__(self, message, results):
+        super().__init__(message)
+        self.results = results
+
+
+def _credit_many(credits, now):
+    """Apply ``{account_id: amount}`` credits with a single UPDATE."""
+    if not credits:
+        return
+    whens = [When(pk=pk, then=Value(amount)) for pk, amount in credits.items()]
+    UserAccount.objects.filter(pk__in=credits).update(
+        balance=F('balance') + Case(*whens, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        updated_at=now,
+    )
+
+
+def bulk_transfer(sender_account_id, items, atomic=True):
+    """
+    Pay many receivers from one sender in a single database transaction.
+
+    ``items`` is a list of ``(receiver_account_id, amount)``; a receiver id of
+    None marks an item whose receiver could not be resolved. Every account
+    involved is locked once in primary-key order, items are checked in order
+    against the sender's running balance, then the debit, all credits, all
+    ``Transaction`` rows and their ledger entries are written with one UPDATE,
+    one CASE UPDATE and two ``bulk_create`` calls, plus two upserts for the
+    monthly analytics.
+
+    With ``atomic=True`` any failing item aborts the whole batch by raising
+    :class:`BulkTransferFailed`; otherwise failing items are skipped. Returns
+    one result dict per item.
+    """
+    with transaction.atomic():
+        receiver_ids = {receiver_id for receiver_id, _ in items if receiver_id is not None}
+        accounts = lock_accounts(receiver_ids | {sender_account_id})
+        if sender_account_id not in accounts:
+            raise AccountNotFound('Sender account not found')
+
+        available = accounts[sender_account_id].balance
+        results, accepted, credits = [], [], {}
+        for index, (receiver_id, raw_amount) in enumerate(items):
+            try:
+                amount = parse_amount(raw_amount)
+                if receiver_id is None or receiver_id not in accounts:
+                    raise AccountNotFound('Receiver not found')
+                if receiver_id == sender_account_id:
+                    raise SameAccount('Cannot send money to the same account')
+                if available < amount:
+                    raise InsufficientBalance('Insufficient balance')
+            except TransferError as e:
+                results.append({'index': index, 'status': 'failed', 'error': str(e)})
+                continue
+            available -= amount
+            credits[receiver_id] = credits.get(receiver_id, Decimal('0')) + amount
+            accepted.append((index, receiver_id, amount))
+            results.append({'index': index, 'status': 'completed', 'amount': amount})
+
+        failed = len(items) - len(accepted)
+        if atomic and failed:
+            for result in results:
+                if result['status'] == 'completed':
+                    result['status'] = 'not_applied'
+            raise BulkTransferFailed(f'No transfers applied: {failed} item(s) failed', results)
+
+        if accepted:
+            now = timezone.now()
+            UserAccount.objects.filter(pk=sender_account_id).update(
+                balance=F('balance') - (accounts[sender_account_id].balance - available), updated_at=now
+            )
+            _credit_many(credits, now)
+            balance_cache.invalidate([sender_account_id, *credits])
+            created = Transaction.objects.bulk_create([
+                Transaction(sender_id=sender_account_id, receiver_id=receiver_id, amount=amount, status='completed')
+                for _, receiver_id, amount in accepted
+            ])
+            # Running balances per account, in item order.
+            balances = {pk: account.balance for pk, account in accounts.items()}
+            entries = []
+            for (index, receiver_id, amount), txn in zip(accepted, created):
+                results[index]['transactionId'] = txn.pk
+                balances[sender_account_id] -= amount
+                balances[receiver_id] += amount
+                entries.extend(entries_for(txn, balances[sender_account_id], balances[receiver_id]))
+            LedgerEntry.objects.bulk_create(entries)
+            analytics.record(
+                (sender_account_id, receiver_id, amount, txn.timestamp)
+                for (_, receiver_id, amount), txn in zip(accepted, created)
+            )
+        return results
@@ -1,20 +1,30 @@
-from .views import SignUp, send_otp, verify_otp,searchNumber,checkHasAccount,searchByUpiId,sendMoneyPhone,getProfile, getTransactions, getBalance, sendMoneyId, createMoneyRequest, createMoneyRequestByUpi, getMoneyRequests, updateRequestStatus
+from .views import SignUp, send_otp, verify_otp, sendMoneyPhone, sendMoneyId, createMoneyRequest, createMoneyRequestByUpi, updateRequestStatus, bulkUpdateRequestStatus, exportStatement, bulkTransfer, getSpendingAnalytics
+from . import async_views, views
+from django.conf import settings
 from django.urls import path
 
+# Read-only endpoints are served by async views under ASGI (see DJBackend/asgi.py).
+reads = async_views if settings.ASYNC_READ_VIEWS else views
+
 urlpatterns = [
     path('signup/', SignUp, name='signup'),
     path('send_otp/', send_otp, name='send_otp'),
     path('verify_otp/', verify_otp, name='verify_otp'),
-    path('searchPhonenumber/', searchNumber, name='searchPhoneNumber'),
-    path('searchByUpiId/', searchByUpiId, name='searchByUpiId'),
-    path('getProfile/', getProfile, name='getProfile'),
-    path('getBalance/', getBalance, name='getBalance'),
+    path('searchPhonenumber/', reads.searchNumber, name='searchPhoneNumber'),
+    path('searchByUpiId/', reads.searchByUpiId, name='searchByUpiId'),
+    path('searchUpiDirectory/', views.searchUpiDirectory, name='searchUpiDirectory'),
+    path('getProfile/', reads.getProfile, name='getProfile'),
+    path('getBalance/', reads.getBalance, name='getBalance'),
     path('sendMoneyId/',sendMoneyId,name='sendMoneyId'),
-    path('getTransactions/',getTransactions,name='getTransactions'),
+    path('getTransactions/',reads.getTransactions,name='getTransactions'),
+    path('exportStatement/', exportStatement, name='exportStatement'),
     path('sendMoneyPhone/',sendMoneyPhone,name='sendMoneyPhone'),
-    path('checkHasAccount/', checkHasAccount, name='checkAccount'),
+    path('bulkTransfer/', bulkTransfer, name='bulkTransfer'),
+    path('checkHasAccount/', reads.checkHasAccount, name='checkAccount'),
     path('createMoneyRequest/', createMoneyRequest, name='createMoneyRequest'),
     path('createMoneyRequestByUpi/', createMoneyRequestByUpi, name='createMoneyRequestByUpi'),
-    path('getMoneyRequests/', getMoneyRequests, name='getMoneyRequests'),
+    path('getMoneyRequests/', reads.getMoneyRequests, name='getMoneyRequests'),
+    path('getSpendingAnalytics/', getSpendingAnalytics, name='getSpendingAnalytics'),
     path('updateRequestStatus/', updateRequestStatus, name='updateRequestStatus'),
+    path('bulkUpdateRequestStatus/', bulkUpdateRequestStatus, name='bulkUpdateRequestStatus'),
 ]
@@ -1,49 +1,58 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-import random
+from django.db import IntegrityError, router, transaction as db_transaction
+from django.utils import timezone
+import csv
+from itertools import chain
 from decimal import Decimal
 from rest_framework.decorators import api_view
-from .models import User, OTP
+from .models import User
 from .models import UserAccount, Transaction, MoneyRequest
+from . import analytics, balance_cache, directory, money_requests, otp_store
+from .archive import archived_months, month_of
+from .idempotency import idempotent
+from .history import (
+    transaction_page, page_payload, legacy_payload, legacy_transactions, cut_archived_months, statement_rows, STATEMENT_COLUMNS,
+)
+from .pagination import decode_cursor, is_paginating, parse_page_size, parse_date_range, InvalidCursor
+from .phone import canonicalize_phone_number, get_phone_candidates
+from .responses import JsonResponse, dumps
+from .routers import replica_reads
+from .resolvers import AccountResolver, resolve_phone, ResolutionError, UserNotFound, AccountMissing
+from .transfers import transfer, bulk_transfer, TransferError, InsufficientBalance, BulkTransferFailed
 # Create your views here.
 
 @api_view(['GET'])
 def send_otp(request):
-    """Generate and store OTP in database"""
+    """Generate an OTP and keep it in the OTP cache until it expires"""
     phone = canonicalize_phone_number(request.GET.get("phone"))
     
     if not phone:
         return JsonResponse({"status": "error", "message": "Phone number required"}, status=400)
     
-    # Generate 6-digit OTP
-    otp_code = str(random.randint(100000, 999999))
-    
-    # Delete old OTPs for this phone number
-    OTP.objects.filter(phoneNumber=phone).delete()
-    
-    # Create new OTP entry
-    OTP.objects.create(
-        phoneNumber=phone,
-        otp=otp_code
-    )
+    try:
+        otp_code = otp_store.issue(phone)
+    except otp_store.RateLimited as e:
+        response = JsonResponse({"status": "error", "message": str(e)}, status=429)
+        response['Retry-After'] = str(e.retry_after)
+        return response
     
     print(f"OTP generated for {phone}: {otp_code}")
     
     # TODO: Later integrate SMS service here
-    # For now, OTP is only stored in database (visible in admin panel)
     
     return JsonResponse({
         "status": "success",
-        "message": "OTP generated successfully. Check admin panel for OTP.",
+        "message": "OTP generated successfully.",
         # Include OTP in development (remove in production)
         "otp": otp_code if settings.DEBUG else None
     })
 
 @api_view(['GET'])
 def verify_otp(request):
-    """Verify OTP from database and check if user exists"""
+    """Verify OTP against the OTP cache and check if user exists"""
     phone = request.GET.get("phone")
     otp = request.GET.get("otp")
     
@@ -51,29 +60,17 @@ def verify_otp(request):
         return JsonResponse({"status": "error", "message": "Phone and OTP required"}, status=400)
     
     try:
-        phone_candidates = get_phone_candidates(phone)
-
-        # Get the most recent OTP for this phone
-        otp_entry = OTP.objects.filter(phoneNumber__in=phone_candidates).first()
-        
-        if not otp_entry:
-            return JsonResponse({"status": "error", "message": "No OTP found. Please request a new one."}, status=404)
+        result = otp_store.verify(canonicalize_phone_number(phone), otp)
         
-        # Check if OTP is valid
-        if not otp_entry.is_valid():
-            return JsonResponse({"status": "error", "message": "OTP expired. Please request a new one."}, status=400)
+        if result == otp_store.MISSING:
+            return JsonResponse({"status": "error", "message": "No OTP found or OTP expired. Please request a new one."}, status=404)
         
-        # Check if OTP matches
-        if otp_entry.otp != otp:
+        if result == otp_store.INVALID:
             return JsonResponse({"status": "error", "message": "Invalid OTP"}, status=400)
         
-        # Mark OTP as verified
-        otp_entry.is_verified = True
-        otp_entry.save()
-        
         # Check if user exists
         try:
-            user = User.objects.filter(phoneNumber__in=phone_candidates).first()
+            user = get_user_by_phone(phone)
             if not user:
                 raise User.DoesNotExist
             is_new_user = False
@@ -104,59 +101,21 @@ def login(upiName, phoneNumber):
         'status': 'success'
     })
 
-def get_phone_candidates(phone):
-    """Return lookup candidates for phone numbers across +91/91/10-digit formats."""
-    if not phone:
-        return []
-
-    raw = str(phone).strip().replace(' ', '').replace('-', '')
-    if raw.startswith('+'):
-        digits = ''.join(ch for ch in raw[1:] if ch.isdigit())
-    else:
-        digits = ''.join(ch for ch in raw if ch.isdigit())
-
-    if not digits:
-        return [raw]
-
-    if len(digits) >= 10:
-        local = digits[-10:]
-    else:
-        local = digits
-
-    candidates = {
-        raw,
-        digits,
-        local,
-        f'+{digits}',
-        f'+91{local}',
-        f'91{local}',
-    }
-    return list(candidates)
-
-
-def canonicalize_phone_number(phone):
-    """Canonical phone format used for writes: +91XXXXXXXXXX"""
-    if not phone:
-        return ''
-
-    raw = str(phone).strip().replace(' ', '').replace('-', '')
-    if raw.startswith('+'):
-        digits_only = ''.join(ch for ch in raw[1:] if ch.isdigit())
-    else:
-        digits_only = ''.join(ch for ch in raw if ch.isdigit())
-
-    if not digits_only:
-        return ''
-
-    local = digits_only[-10:] if len(digits_only) >= 10 else digits_only
-    return f'+91{local}' if local else ''
-
-
 def get_user_by_phone(phone):
-    candidates = get_phone_candidates(phone)
-    if not candidates:
+    """
+    Resolve a user by phone with a single indexed equality lookup.
+
+    Rows written before ``phone_canonical`` existed (or left NULL by the
+    backfill because of a duplicate) are still matched through the legacy
+    candidate IN-list while ``PHONE_LOOKUP_LEGACY_FALLBACK`` is enabled.
+    """
+    canonical = canonicalize_phone_number(phone)
+    if not canonical:
         return None
-    return User.objects.filter(phoneNumber__in=candidates).first()
+    user = User.objects.filter(phone_canonical=canonical).first()
+    if user is None and settings.PHONE_LOOKUP_LEGACY_FALLBACK:
+        user = User.objects.filter(phoneNumber__in=get_phone_candidates(phone)).first()
+    return user
 
 @api_view(['POST'])
 def SignUp(request):
@@ -173,61 +132,43 @@ def SignUp(request):
     # OTP was already verified to reach this page (via verify_otp endpoint).
     # No additional OTP check needed here.
     
-    # Check if user already exists
+    upiId = generateUpiId(upiName)
     try:
-        existing_user = User.objects.filter(phoneNumber__in=get_phone_candidates(phoneNumber)).first()
-        if existing_user:
-            return JsonResponse({
-                'error': 'User already exists',
-                'status': 'error'
-            }, status=400)
-    except Exception:
-        pass
-    
-    # Check if upiName is already taken
-    try:
-        User.objects.get(upiName=upiName)
+        # Uniqueness is left to the phone, upiName and upiMail constraints, so
+        # a signup is two INSERTs with no lookups first.
+        with db_transaction.atomic():
+            user = User.objects.create(
+                phoneNumber=phoneNumber,
+                upiName=upiName,
+                upiMail=upiId
+            )
+            UserAccount.objects.create(user=user)
+    except IntegrityError as e:
         return JsonResponse({
-            'error': 'UPI name already taken',
+            'error': signup_conflict(e),
             'status': 'error'
         }, status=400)
-    except User.DoesNotExist:
-        pass
-    
-    try:
-        upiId = generateUpiId(upiName)
-    except Exception as e:
-        return JsonResponse({
-            'error': str(e),
-            'status': 'error'
-        }, status=500)
-        
-    try:
-        # Create user
-        user = User.objects.create(
-            phoneNumber=phoneNumber,
-            upiName=upiName,
-            upiMail=upiId
-        )
-        user.save()
-        
-        # Create account with initial balance
-        user_account = UserAccount.objects.create(user=user)
-        user_account.save()
-        
-        return JsonResponse({
-            'upiName': upiName,
-            'phoneNumber': phoneNumber,
-            'upiId': upiId,
-            'status': 'success'
-        })
-        
     except Exception as e:
         return JsonResponse({
             'error': str(e),
             'status': 'error'
         }, status=500)
 
+    return JsonResponse({
+        'upiName': upiName,
+        'phoneNumber': phoneNumber,
+        'upiId': upiId,
+        'status': 'success'
+    })
+
+
+def signup_conflict(error):
+    """Client-facing message for the unique constraint a signup ``IntegrityError`` hit."""
+    message = str(error).lower()
+    if 'upiname' in message or 'upimail' in message:
+        return 'UPI name already taken'
+    return 'User already exists'
+
 
 def generateUpiId(upiName):
     upi_id = upiName.lower().replace(" ", "") + "@upi"
@@ -235,6 +176,7 @@ def generateUpiId(upiName):
 
 
 @api_view(['GET'])
+@replica_reads
 def searchNumber(request):
     phoneNumber = request.GET.get('phoneNumber')
     try:
@@ -253,6 +195,7 @@ def searchNumber(request):
         }, status=404)
         
 @api_view(['GET'])
+@replica_reads
 def searchByUpiId(request):
     upiId = request.GET.get('upiId')
     try:
@@ -269,6 +212,28 @@ def searchByUpiId(request):
         }, status=404)
         
 @api_view(['GET'])
+@replica_reads
+def searchUpiDirectory(request):
+    """Autocomplete payees by prefix or typo-tolerant match on UPI name or ID"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({
+            'error': 'Search query is required',
+            'status': 'error'
+        }, status=400)
+    try:
+        limit = int(request.GET.get('limit') or 10)
+    except ValueError:
+        limit = 10
+    limit = max(1, min(limit, settings.UPI_SEARCH_MAX_RESULTS))
+
+    return JsonResponse({
+        'results': [{'upiName': name, 'upiId': mail} for name, mail in directory.search(query, limit)],
+        'status': 'success'
+    })
+
+@api_view(['GET'])
+@replica_reads
 def getProfile(request):
     phoneNumber = request.GET.get('phoneNumber')
     try:
@@ -290,21 +255,26 @@ def getProfile(request):
 @api_view(['GET'])
 def getBalance(request):
     phoneNumber = request.GET.get('phoneNumber')
+    canonical = canonicalize_phone_number(phoneNumber)
+    cached, token = balance_cache.get_balance(canonical) if canonical else (None, None)
+    if cached is not None:
+        return JsonResponse({
+            'balance': cached,
+            'status': 'success'
+        })
     try:
-        user = get_user_by_phone(phoneNumber)
-        if not user:
-            raise User.DoesNotExist
-        user_account = UserAccount.objects.get(user=user)
+        user_account = resolve_phone(phoneNumber)
+        balance_cache.set_balance(canonical, user_account.pk, user_account.balance, token)
         return JsonResponse({
             'balance': str(user_account.balance),
             'status': 'success'
         })
-    except User.DoesNotExist:
+    except UserNotFound:
         return JsonResponse({
             'error': 'User not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'User account not found',
             'status': 'error'
@@ -312,57 +282,46 @@ def getBalance(request):
 
 @csrf_exempt
 @api_view(['POST'])
+@idempotent
 def sendMoneyId(request):
     sender_phone = request.data.get('senderPhone')
     receiver_upi = request.data.get('receiverUpi')
-    amount = Decimal(str(request.data.get('amount')))
+    amount = request.data.get('amount')
+    accounts = AccountResolver(phones=[sender_phone], upi_ids=[receiver_upi])
     
     try:
-        sender = User.objects.get(phoneNumber=sender_phone)
-        sender_account = UserAccount.objects.get(user=sender)
-    except User.DoesNotExist:
+        sender_account = accounts.phone(sender_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Sender not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Sender account not found',
             'status': 'error'
         }, status=404)
     
     try:
-        receiver = User.objects.get(upiMail=receiver_upi)
-        receiver_account = UserAccount.objects.get(user=receiver)
-    except User.DoesNotExist:
+        receiver_account = accounts.upi(receiver_upi)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Receiver not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Receiver account not found',
             'status': 'error'
         }, status=404)
     
-    if sender_account.balance < amount:
+    try:
+        txn = transfer(sender_account.pk, receiver_account.pk, amount)
+    except TransferError as e:
         return JsonResponse({
-            'error': 'Insufficient balance',
+            'error': str(e),
             'status': 'error'
-        }, status=400)
-    sender_account.balance = sender_account.balance - amount
-    receiver_account.balance = receiver_account.balance + amount
-    sender_account.save()
-    receiver_account.save()
-    
-    try:
-        transaction = Transaction.objects.create(
-            sender=sender_account,
-            receiver=receiver_account,
-            amount=amount,
-            status='completed'
-        )
-        transaction.save()
+        }, status=e.status_code)
     except Exception as e:
         return JsonResponse({
             'error': str(e),
@@ -370,127 +329,242 @@ def sendMoneyId(request):
         }, status=500)
     
     return JsonResponse({
-        'message': f'Successfully sent {amount} to {receiver.upiName}',
+        'message': f'Successfully sent {txn.amount} to {receiver_account.user.upiName}',
         'status': 'success'
     })
 
 @api_view(['POST'])
+@idempotent
 def sendMoneyPhone(request):
     sender_phone = request.data.get('senderPhone')
     receiver_phone = request.data.get('receiverPhone')
-    amount = Decimal(str(request.data.get('amount')))
+    amount = request.data.get('amount')
+    accounts = AccountResolver(phones=[sender_phone, receiver_phone])
     
     try:
-        sender = get_user_by_phone(sender_phone)
-        if not sender:
-            raise User.DoesNotExist
-        sender_account = UserAccount.objects.get(user=sender)
-    except User.DoesNotExist:
+        sender_account = accounts.phone(sender_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Sender not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Sender account not found',
             'status': 'error'
         }, status=404)
     
     try:
-        receiver = get_user_by_phone(receiver_phone)
-        if not receiver:
-            raise User.DoesNotExist
-        receiver_account = UserAccount.objects.get(user=receiver)
-    except User.DoesNotExist:
+        receiver_account = accounts.phone(receiver_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Receiver not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Receiver account not found',
             'status': 'error'
         }, status=404)
     
-    if sender_account.balance < amount:
+    try:
+        txn = transfer(sender_account.pk, receiver_account.pk, amount)
+    except TransferError as e:
         return JsonResponse({
-            'error': 'Insufficient balance',
+            'error': str(e),
+            'status': 'error'
+        }, status=e.status_code)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=500)
+    
+    return JsonResponse({
+        'message': f'Successfully sent {txn.amount} to {receiver_account.user.upiName}',
+        'status': 'success'
+    })
+
+def _resolve_bulk_receivers(accounts, items):
+    """Map each bulk item to a receiver account id, or None if it does not resolve."""
+    resolved = []
+    for item in items:
+        try:
+            if item.get('receiverPhone'):
+                receiver_id = accounts.phone(item['receiverPhone']).pk
+            else:
+                receiver_id = accounts.upi(item.get('receiverUpi')).pk
+        except ResolutionError:
+            receiver_id = None
+        resolved.append((receiver_id, item.get('amount')))
+    return resolved
+
+@api_view(['POST'])
+@idempotent
+def bulkTransfer(request):
+    """Pay many receivers (by phone or UPI id) from one sender in one batch."""
+    sender_phone = request.data.get('senderPhone')
+    items = request.data.get('transfers')
+    mode = request.data.get('mode', 'all_or_nothing')
+    
+    if mode not in ('all_or_nothing', 'best_effort'):
+        return JsonResponse({
+            'error': 'mode must be all_or_nothing or best_effort',
+            'status': 'error'
+        }, status=400)
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return JsonResponse({
+            'error': 'transfers must be a non-empty list',
+            'status': 'error'
+        }, status=400)
+    if len(items) > settings.BULK_TRANSFER_MAX_ITEMS:
+        return JsonResponse({
+            'error': f'At most {settings.BULK_TRANSFER_MAX_ITEMS} transfers per request',
             'status': 'error'
         }, status=400)
-    sender_account.balance = sender_account.balance - amount
-    receiver_account.balance = receiver_account.balance + amount
-    sender_account.save()
-    receiver_account.save()
     
+    # Sender and every receiver come back from a single query.
+    accounts = AccountResolver(
+        phones=[sender_phone, *(item.get('receiverPhone') for item in items)],
+        upi_ids=[item.get('receiverUpi') for item in items],
+    )
     try:
-        transaction = Transaction.objects.create(
-            sender=sender_account,
-            receiver=receiver_account,
-            amount=amount,
-            status='completed'
+        sender_account = accounts.phone(sender_phone)
+    except ResolutionError:
+        return JsonResponse({
+            'error': 'Sender not found',
+            'status': 'error'
+        }, status=404)
+    
+    try:
+        results = bulk_transfer(
+            sender_account.pk, _resolve_bulk_receivers(accounts, items), atomic=(mode == 'all_or_nothing')
         )
-        transaction.save()
-    except Exception as e:
+    except BulkTransferFailed as e:
         return JsonResponse({
             'error': str(e),
+            'results': e.results,
             'status': 'error'
-        }, status=500)
+        }, status=e.status_code)
+    except TransferError as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=e.status_code)
     
+    succeeded = [result for result in results if result['status'] == 'completed']
     return JsonResponse({
-        'message': f'Successfully sent {amount} to {receiver.upiName}',
+        'mode': mode,
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'totalAmount': sum((result['amount'] for result in succeeded), Decimal('0.00')),
+        'results': results,
         'status': 'success'
     })
 
 @api_view(['POST'])
+@replica_reads
 def getTransactions(request):
-    phoneNumber = request.data.get('phoneNumber') or request.GET.get('phoneNumber')
+    """One keyset-paginated page of a user's merged transaction history."""
+    params = request.data if request.data else request.GET
+    phoneNumber = params.get('phoneNumber') or request.GET.get('phoneNumber')
     try:
-        user = get_user_by_phone(phoneNumber)
-        if not user:
-            raise User.DoesNotExist
-        user_account = UserAccount.objects.get(user=user)
-        sent_transactions = Transaction.objects.filter(sender=user_account).values('receiver__user__upiName', 'amount', 'timestamp', 'status')
-        received_transactions = Transaction.objects.filter(receiver=user_account).values('sender__user__upiName', 'amount', 'timestamp', 'status')
-        
-        transactions = {
-            'sent': list(sent_transactions),
-            'received': list(received_transactions)
-        }
-        
+        cursor = params.get('cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
         return JsonResponse({
-            'transactions': transactions,
-            'status': 'success'
-        })
-    except User.DoesNotExist:
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
+    page_size = parse_page_size(params.get('pageSize'))
+    
+    try:
+        user_account = resolve_phone(phoneNumber)
+        if not is_paginating(params):
+            return JsonResponse(legacy_payload(*legacy_transactions(user_account.pk, settings.LEGACY_LISTING_LIMIT)))
+        rows, next_cursor = transaction_page(user_account.pk, cursor, page_size)
+        archived = archived_months(user_account.pk) if next_cursor is None else ()
+        return JsonResponse(page_payload(rows, next_cursor, archived))
+    except UserNotFound:
         return JsonResponse({
             'error': 'User not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'User account not found',
             'status': 'error'
         }, status=404)
 
+class _Echo:
+    """File-like object whose write() just returns the line for csv.writer."""
+    def write(self, value):
+        return value
+
+
+@api_view(['GET'])
+@replica_reads
+def exportStatement(request):
+    """Stream a user's full statement as NDJSON or CSV."""
+    phoneNumber = request.GET.get('phoneNumber')
+    export_format = request.GET.get('exportFormat', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({
+            'error': 'exportFormat must be ndjson or csv',
+            'status': 'error'
+        }, status=400)
+    try:
+        start, end = parse_date_range(request.GET.get('from'), request.GET.get('to'))
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
+    
+    try:
+        user_account = resolve_phone(phoneNumber)
+    except ResolutionError:
+        return JsonResponse({
+            'error': 'User account not found',
+            'status': 'error'
+        }, status=404)
+    
+    using = router.db_for_read(Transaction)
+    cut_months = cut_archived_months(user_account.pk, start, end, using=using)
+    rows = statement_rows(user_account.pk, start, end, settings.STATEMENT_EXPORT_CHUNK_SIZE, using=using)
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        lines = chain([writer.writerow(STATEMENT_COLUMNS)], (writer.writerow(row) for row in rows))
+        content_type = 'text/csv'
+    else:
+        lines = (
+            dumps(dict(zip(STATEMENT_COLUMNS, row))) + b'\n'
+            for row in rows
+        )
+        content_type = 'application/x-ndjson'
+    
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="statement.{export_format}"'
+    if cut_months:
+        # Archived months hold only monthly totals, so ones the range cuts are left out.
+        response['X-Omitted-Archived-Months'] = ','.join(cut_months)
+    return response
+
 @api_view(['GET'])        
 def checkHasAccount(request):
     phoneNumber = request.GET.get('phoneNumber')
-    print('here')
     try:
-        user = get_user_by_phone(phoneNumber)
-        if not user:
-            raise User.DoesNotExist
-        user_account = UserAccount.objects.get(user=user)
+        user_account = resolve_phone(phoneNumber)
         return JsonResponse({
             'hasAccount': True,
             'status': 'success'
         })
-    except User.DoesNotExist:
+    except UserNotFound:
         return JsonResponse({
             'hasAccount': False,
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'hasAccount': False,
             'status': 'error'
@@ -498,39 +572,35 @@ def checkHasAccount(request):
 
 # Money Request APIs
 @api_view(['POST'])
+@idempotent
 def createMoneyRequest(request):
     requester_phone = request.data.get('requesterPhone')
     requestee_phone = request.data.get('requesteePhone')
     amount = Decimal(str(request.data.get('amount')))
     message = request.data.get('message', '')
+    accounts = AccountResolver(phones=[requester_phone, requestee_phone])
     
     try:
-        requester = get_user_by_phone(requester_phone)
-        if not requester:
-            raise User.DoesNotExist
-        requester_account = UserAccount.objects.get(user=requester)
-    except User.DoesNotExist:
+        requester_account = accounts.phone(requester_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Requester not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Requester account not found',
             'status': 'error'
         }, status=404)
     
     try:
-        requestee = get_user_by_phone(requestee_phone)
-        if not requestee:
-            raise User.DoesNotExist
-        requestee_account = UserAccount.objects.get(user=requestee)
-    except User.DoesNotExist:
+        requestee_account = accounts.phone(requestee_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Requestee not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Requestee account not found',
             'status': 'error'
@@ -544,10 +614,9 @@ def createMoneyRequest(request):
             message=message,
             status='pending'
         )
-        money_request.save()
         
         return JsonResponse({
-            'message': f'Money request of ₹{amount} sent to {requestee.upiName}',
+            'message': f'Money request of ₹{amount} sent to {requestee_account.user.upiName}',
             'requestId': money_request.id,
             'status': 'success'
         })
@@ -558,37 +627,35 @@ def createMoneyRequest(request):
         }, status=500)
 
 @api_view(['POST'])
+@idempotent
 def createMoneyRequestByUpi(request):
     requester_phone = request.data.get('requesterPhone')
     requestee_upi = request.data.get('requesteeUpi')
     amount = Decimal(str(request.data.get('amount')))
     message = request.data.get('message', '')
+    accounts = AccountResolver(phones=[requester_phone], upi_ids=[requestee_upi])
     
     try:
-        requester = get_user_by_phone(requester_phone)
-        if not requester:
-            raise User.DoesNotExist
-        requester_account = UserAccount.objects.get(user=requester)
-    except User.DoesNotExist:
+        requester_account = accounts.phone(requester_phone)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Requester not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Requester account not found',
             'status': 'error'
         }, status=404)
     
     try:
-        requestee = User.objects.get(upiMail=requestee_upi)
-        requestee_account = UserAccount.objects.get(user=requestee)
-    except User.DoesNotExist:
+        requestee_account = accounts.upi(requestee_upi)
+    except UserNotFound:
         return JsonResponse({
             'error': 'Requestee not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'Requestee account not found',
             'status': 'error'
@@ -602,10 +669,9 @@ def createMoneyRequestByUpi(request):
             message=message,
             status='pending'
         )
-        money_request.save()
         
         return JsonResponse({
-            'message': f'Money request of ₹{amount} sent to {requestee.upiName}',
+            'message': f'Money request of ₹{amount} sent to {requestee_account.user.upiName}',
             'requestId': money_request.id,
             'status': 'success'
         })
@@ -616,43 +682,67 @@ def createMoneyRequestByUpi(request):
         }, status=500)
 
 @api_view(['GET'])
+@replica_reads
 def getMoneyRequests(request):
+    """One keyset-paginated page of a user's money requests, with filters."""
     phone_number = request.GET.get('phoneNumber')
+    try:
+        filters = money_requests.parse_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
     
     try:
-        user = get_user_by_phone(phone_number)
-        if not user:
-            raise User.DoesNotExist
-        user_account = UserAccount.objects.get(user=user)
-        
-        # Get sent requests
-        sent_requests = MoneyRequest.objects.filter(requester=user_account).values(
-            'id', 'requestee__user__upiName', 'requestee__user__phoneNumber', 
-            'amount', 'message', 'status', 'created_at', 'updated_at'
-        )
-        
-        # Get received requests
-        received_requests = MoneyRequest.objects.filter(requestee=user_account).values(
-            'id', 'requester__user__upiName', 'requester__user__phoneNumber',
-            'amount', 'message', 'status', 'created_at', 'updated_at'
-        )
-        
+        user_account = resolve_phone(phone_number)
+    except UserNotFound:
         return JsonResponse({
-            'sentRequests': list(sent_requests),
-            'receivedRequests': list(received_requests),
-            'status': 'success'
-        })
-        
-    except User.DoesNotExist:
+            'error': 'User not found',
+            'status': 'error'
+        }, status=404)
+    except AccountMissing:
+        return JsonResponse({
+            'error': 'User account not found',
+            'status': 'error'
+        }, status=404)
+    
+    if not is_paginating(request.GET):
+        return JsonResponse(money_requests.legacy_payload(
+            *money_requests.legacy_requests(user_account.pk, settings.LEGACY_LISTING_LIMIT, **filters)
+        ))
+    rows, next_cursor = money_requests.request_page(user_account.pk, **filters)
+    return JsonResponse(money_requests.page_payload(rows, next_cursor, money_requests.pending_count(user_account.pk)))
+
+@api_view(['GET'])
+@replica_reads
+def getSpendingAnalytics(request):
+    """A user's spent and received totals for one month, with their top payees."""
+    phone_number = request.GET.get('phoneNumber')
+    month = request.GET.get('month')
+    try:
+        month = analytics.parse_month(month) if month else month_of(timezone.now())
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'status': 'error'
+        }, status=400)
+    top = parse_page_size(request.GET.get('top'), default=analytics.DEFAULT_TOP_PAYEES)
+    
+    try:
+        user_account = resolve_phone(phone_number)
+    except UserNotFound:
         return JsonResponse({
             'error': 'User not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'User account not found',
             'status': 'error'
         }, status=404)
+    
+    return JsonResponse({**analytics.month_summary(user_account.pk, month, top), 'status': 'success'})
 
 @api_view(['POST'])
 def updateRequestStatus(request):
@@ -661,69 +751,39 @@ def updateRequestStatus(request):
     phone_number = request.data.get('phoneNumber')
     
     try:
-        money_request = MoneyRequest.objects.get(id=request_id)
-        user = get_user_by_phone(phone_number)
-        if not user:
-            raise User.DoesNotExist
-        user_account = UserAccount.objects.get(user=user)
-        
-        # Check if user has permission to update this request
-        if money_request.requester != user_account and money_request.requestee != user_account:
-            return JsonResponse({
-                'error': 'Unauthorized to update this request',
-                'status': 'error'
-            }, status=403)
-        
-        # Validate status transitions
-        if new_status == 'cancelled' and money_request.requester != user_account:
-            return JsonResponse({
-                'error': 'Only requester can cancel the request',
-                'status': 'error'
-            }, status=403)
+        user_account = resolve_phone(phone_number)
         
-        if new_status in ['approved', 'rejected'] and money_request.requestee != user_account:
-            return JsonResponse({
-                'error': 'Only requestee can approve or reject the request',
-                'status': 'error'
-            }, status=403)
-        
-        if money_request.status != 'pending':
-            return JsonResponse({
-                'error': 'Request has already been processed',
-                'status': 'error'
-            }, status=400)
-        
-        # If approved, process the payment
-        if new_status == 'approved':
-            requestee_account = money_request.requestee
-            requester_account = money_request.requester
-            amount = money_request.amount
+        with db_transaction.atomic():
+            # Lock the request row so two concurrent approvals cannot both
+            # see it as pending and settle the payment twice.
+            money_request = MoneyRequest.objects.select_for_update().get(id=request_id)
             
-            # Check if requestee has sufficient balance
-            if requestee_account.balance < amount:
+            try:
+                money_requests.check_status_change(money_request, user_account.pk, new_status)
+            except money_requests.RequestUpdateError as e:
                 return JsonResponse({
-                    'error': 'Insufficient balance to approve request',
+                    'error': str(e),
                     'status': 'error'
-                }, status=400)
+                }, status=e.status_code)
             
-            # Process the payment
-            requestee_account.balance -= amount
-            requester_account.balance += amount
-            requestee_account.save()
-            requester_account.save()
+            # If approved, process the payment
+            if new_status == 'approved':
+                try:
+                    transfer(money_request.requestee_id, money_request.requester_id, money_request.amount)
+                except InsufficientBalance:
+                    return JsonResponse({
+                        'error': 'Insufficient balance to approve request',
+                        'status': 'error'
+                    }, status=400)
+                except TransferError as e:
+                    return JsonResponse({
+                        'error': str(e),
+                        'status': 'error'
+                    }, status=e.status_code)
             
-            # Create transaction record
-            transaction = Transaction.objects.create(
-                sender=requestee_account,
-                receiver=requester_account,
-                amount=amount,
-                status='completed'
-            )
-            transaction.save()
-        
-        # Update request status
-        money_request.status = new_status
-        money_request.save()
+            # Update request status
+            money_request.status = new_status
+            money_request.save(update_fields=['status', 'updated_at'])
         
         return JsonResponse({
             'message': f'Request {new_status} successfully',
@@ -735,12 +795,12 @@ def updateRequestStatus(request):
             'error': 'Request not found',
             'status': 'error'
         }, status=404)
-    except User.DoesNotExist:
+    except UserNotFound:
         return JsonResponse({
             'error': 'User not found',
             'status': 'error'
         }, status=404)
-    except UserAccount.DoesNotExist:
+    except AccountMissing:
         return JsonResponse({
             'error': 'User account not found',
             'status': 'error'
@@ -749,4 +809,63 @@ def updateRequestStatus(request):
         return JsonResponse({
             'error': str(e),
             'status': 'error'
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+@api_view(['POST'])
+@idempotent
+def bulkUpdateRequestStatus(request):
+    """Approve, reject or cancel many money requests in one batch."""
+    phone_number = request.data.get('phoneNumber')
+    request_ids = request.data.get('requestIds')
+    new_status = request.data.get('status')
+    mode = request.data.get('mode', 'all_or_nothing')
+    
+    if mode not in ('all_or_nothing', 'best_effort'):
+        return JsonResponse({
+            'error': 'mode must be all_or_nothing or best_effort',
+            'status': 'error'
+        }, status=400)
+    if new_status not in money_requests.UPDATE_STATUSES:
+        return JsonResponse({
+            'error': f'status must be one of {", ".join(money_requests.UPDATE_STATUSES)}',
+            'status': 'error'
+        }, status=400)
+    if (not isinstance(request_ids, list) or not request_ids
+            or not all(isinstance(request_id, int) and not isinstance(request_id, bool) for request_id in request_ids)):
+        return JsonResponse({
+            'error': 'requestIds must be a non-empty list of ids',
+            'status': 'error'
+        }, status=400)
+    if len(request_ids) > settings.BULK_TRANSFER_MAX_ITEMS:
+        return JsonResponse({
+            'error': f'At most {settings.BULK_TRANSFER_MAX_ITEMS} requests per call',
+            'status': 'error'
+        }, status=400)
+    
+    try:
+        user_account = resolve_phone(phone_number)
+    except ResolutionError:
+        return JsonResponse({
+            'error': 'User account not found',
+            'status': 'error'
+        }, status=404)
+    
+    try:
+        results = money_requests.bulk_update_status(
+            user_account.pk, request_ids, new_status, atomic=(mode == 'all_or_nothing')
+        )
+    except BulkTransferFailed as e:
+        return JsonResponse({
+            'error': str(e),
+            'results': e.results,
+            'status': 'error'
+        }, status=e.status_code)
+    
+    succeeded = [result for result in results if result['status'] == new_status]
+    return JsonResponse({
+        'mode': mode,
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'totalAmount': sum((result['amount'] for result in succeeded), Decimal('0.00')),
+        'results': results,
+        'status': 'success'
+    })